@@ -0,0 +1,118 @@
+"""
+Prefix index over company names for the dashboard search box
+"""
+import hashlib
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+import pandas as pd
+from rapidfuzz.utils import default_process
+
+
+class CompanyIndex:
+    """Character tries over full company names and their individual words.
+
+    Built once per loaded database so suggestion lookups cost O(len(query))
+    to reach the matching subtree instead of a scan over every company.
+    """
+
+    _IDS = None  # trie key holding the company ids that end at a node
+
+    def __init__(self, names: Iterable):
+        self.names: List[str] = []
+        self.choices: List[str] = []  # preprocessed names for fuzzy scoring, aligned with names
+        self._name_trie: Dict = {}
+        self._word_trie: Dict = {}
+
+        seen = set()
+        for name in names:
+            if pd.isna(name):
+                continue
+            display = str(name)
+            if display in seen:
+                continue
+            seen.add(display)
+
+            company_id = len(self.names)
+            self.names.append(display)
+            self.choices.append(default_process(display))
+
+            key = self._normalize(display)
+            self._insert(self._name_trie, key, company_id)
+            for word in set(key.split()):
+                self._insert(self._word_trie, word, company_id)
+
+        # Content identity of the indexed names; unlike id(), it is never reused for other data
+        self.fingerprint = hashlib.blake2b('\n'.join(self.names).encode(), digest_size=16).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Lowercase and collapse whitespace"""
+        return ' '.join(str(text).lower().split())
+
+    @classmethod
+    def _insert(cls, trie: Dict, key: str, company_id: int):
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node.setdefault(cls._IDS, []).append(company_id)
+
+    @classmethod
+    def _prefix_ids(cls, trie: Dict, prefix: str) -> Set[int]:
+        """Ids of every key in the trie that starts with prefix"""
+        node = trie
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return set()
+
+        ids = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key is cls._IDS:
+                    ids.update(child)
+                else:
+                    stack.append(child)
+        return ids
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str, str]]:
+        """Return (company_name, match_info, match_type) for prefix and word matches.
+
+        Names starting with the whole query come first, then names whose words
+        start with the query terms (at least half of the terms must match).
+        """
+        q = self._normalize(query)
+        terms = list(dict.fromkeys(q.split()))
+        if not terms:
+            return []
+
+        results = []
+        used = set()
+
+        # Whole-name prefix matches, shortest (closest) names first
+        prefix_hits = sorted(self._prefix_ids(self._name_trie, q), key=lambda i: len(self.names[i]))
+        for company_id in prefix_hits[:limit]:
+            results.append((self.names[company_id], "name starts with query", "word_match"))
+            used.add(company_id)
+
+        # Word-prefix matches, ranked by how many terms matched
+        term_counts = Counter()
+        for term in terms:
+            term_counts.update(self._prefix_ids(self._word_trie, term))
+
+        word_hits = sorted(
+            (company_id for company_id, count in term_counts.items()
+             if company_id not in used and count * 2 >= len(terms)),
+            key=lambda i: (-term_counts[i], len(self.names[i]))
+        )
+        for company_id in word_hits[:max(0, limit - len(results))]:
+            count = term_counts[company_id]
+            match_type = "word_match" if count == len(terms) else "fallback"
+            results.append((self.names[company_id], f"{count}/{len(terms)} terms matched", match_type))
+
+        return results
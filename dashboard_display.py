@@ -11,7 +11,7 @@ from risk_scoring import (
     get_alert_message
 )
 from data_utils import get_recent_activity_and_latest_date, format_date_for_display
-from report_generation import generate_pdf_report, create_export_data
+from report_generation import generate_pdf_report, create_export_data, exportable_result, report_timestamp
 
 
 def _slugify(name: str) -> str:
@@ -92,7 +92,7 @@ def render_company_header(result, business_metrics):
 
             # PDF (fallback to JSON if PDF fails)
             try:
-                pdf_data = generate_pdf_report(result)
+                pdf_data = generate_pdf_report(result, report_timestamp())
                 st.download_button(
                     "📋 Full PDF Report",
                     pdf_data,
@@ -103,7 +103,7 @@ def render_company_header(result, business_metrics):
                 )
             except Exception as e:
                 # Optional: small JSON fallback button if PDF fails
-                enhanced = result.copy()
+                enhanced = exportable_result(result)
                 enhanced['enhanced_scoring'] = translate_risk_to_business_language(result)
                 st.download_button(
                     "🧾 JSON",
@@ -581,7 +581,7 @@ def render_export_options(result):
 
     with col2:
         try:
-            pdf_data = generate_pdf_report(result)
+            pdf_data = generate_pdf_report(result, report_timestamp())
             st.download_button(
                 "📋 Full PDF Report",
                 pdf_data,
@@ -591,7 +591,7 @@ def render_export_options(result):
         except Exception as e:
             st.error(f"Failed to generate PDF: {e}")
             # Fallback to JSON if PDF generation fails
-            enhanced_result = result.copy()
+            enhanced_result = exportable_result(result)
             enhanced_result['enhanced_scoring'] = translate_risk_to_business_language(result)
             json_data = json.dumps(enhanced_result, indent=2, default=str)
             st.download_button(
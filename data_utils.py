@@ -4,9 +4,12 @@ Data loading, processing, and utility functions for the FET dashboard
 import pandas as pd
 import re
 import streamlit as st
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 from datetime import datetime, timedelta
 from typing import List, Tuple
 from fet_utils import FETDataUtils
+from company_index import CompanyIndex
 
 def _norm_key(name: str) -> str:
     # normalize and also strip any trailing parentheticals for dedupe
@@ -123,46 +126,45 @@ def format_date_for_display(date_value) -> str:
     return "Invalid Date"
 
 
-@st.cache_resource(show_spinner=False)
-def load_fet_checker_cached(uploaded_file_data: bytes = None):
-    """Load FET checker with caching to prevent multiple loads"""
-    try:
-        # Import here to avoid circular imports
-        from fet_core3 import FETCoreEngine
-        from pathlib import Path
+def _build_fet_checker(uploaded_file_data: bytes = None, wb_file_data: bytes = None):
+    """Build a FET checker for the given data, raising if the database cannot be loaded"""
+    # Import here to avoid circular imports
+    from fet_core3 import FETCoreEngine
+    from pathlib import Path
 
-        app_dir = Path(__file__).parent
-        checker = FETCoreEngine(app_dir)
+    app_dir = Path(__file__).parent
+    checker = FETCoreEngine(app_dir)
 
-        # Try to load database
-        if checker.load_database(uploaded_file_data):
-            return checker
-        else:
-            return None
-    except Exception as e:
-        st.error(f"❌ Failed to initialize FET checker: {e}")
-        return None
+    if not checker.load_database(uploaded_file_data):
+        raise RuntimeError("FET database could not be loaded")
 
+    if wb_file_data:
+        # Private to this (session-scoped) checker; the shared handler keeps the default list
+        checker.use_wb_upload(wb_file_data)
 
-def load_fet_checker(uploaded_file_data: bytes = None):
-    """Wrapper to handle uploaded data (can't cache functions with mutable args)"""
-    if uploaded_file_data is None:
-        return load_fet_checker_cached()
-    else:
-        # For uploaded files, we need to create a new instance
-        try:
-            from fet_core3 import FETCoreEngine
-            from pathlib import Path
+    # Build the search index with the checker so no session pays for it on first search
+    get_company_index(checker)
+    return checker
 
-            app_dir = Path(__file__).parent
-            checker = FETCoreEngine(app_dir)
-            if checker.load_database(uploaded_file_data):
-                return checker
-            else:
-                return None
-        except Exception as e:
-            st.error(f"❌ Failed to initialize FET checker: {e}")
-            return None
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_fet_checker_cached():
+    """Load the default-dataset FET checker once and share it across all sessions"""
+    # Raise rather than return None: exceptions are not cached, so a later attempt retries
+    return _build_fet_checker()
+
+
+def load_fet_checker(uploaded_file_data: bytes = None, wb_file_data: bytes = None):
+    """Checker for the default or uploaded data, or None if loading failed"""
+    try:
+        if uploaded_file_data is None and wb_file_data is None:
+            return load_fet_checker_cached()
+        # Uploads stay session-scoped, as they were before the shared cache: a process-wide
+        # entry per upload would pin a full engine, and the uploaded data, for the process lifetime
+        return _build_fet_checker(uploaded_file_data, wb_file_data)
+    except Exception as e:
+        st.error(f"❌ Failed to initialize FET checker: {e}")
+        return None
 
 
 def get_recent_activity_and_latest_date(df_details):
@@ -206,6 +208,15 @@ def get_recent_activity_and_latest_date(df_details):
     return recent_activity, latest_date
 
 
+def get_company_index(checker) -> CompanyIndex:
+    """Company search index for a checker, built once and kept on the (cached) checker"""
+    index = getattr(checker, 'company_index', None)
+    if index is None:
+        index = CompanyIndex(checker.df_master[FETDataUtils.COLUMNS['company_group']].dropna().unique())
+        checker.company_index = index
+    return index
+
+
 def get_enhanced_company_suggestions(checker, search_query, max_results=9):
     """
     Enhanced company search using fet_core's advanced capabilities
@@ -232,46 +243,32 @@ def get_enhanced_company_suggestions(checker, search_query, max_results=9):
         except Exception as e:
             st.error(f"Word-by-word search error: {e}")
 
-    # Method 2: Try direct fuzzy matching for additional high-confidence matches
-    try:
-        fuzzy_result = checker._fuzzy_match_company(search_query, threshold=70)
-        if fuzzy_result:
-            fuzzy_company, confidence = fuzzy_result
-            if fuzzy_company not in seen_companies and confidence >= 75:
-                match_info = f"{confidence}% similarity"
-                suggestions.append((fuzzy_company, match_info, "fuzzy_match"))
-                seen_companies.add(fuzzy_company)
-    except Exception as e:
-        st.error(f"Fuzzy matching error: {e}")
-
-    # Method 3: Fallback to simple filtering with improved logic
-    if len(suggestions) < 3 and hasattr(checker, 'df_master'):
+    # Method 2: Prefix/word lookups in the prebuilt company index
+    if hasattr(checker, 'df_master'):
         try:
-            from fet_utils import FETDataUtils
-            all_companies = checker.df_master[FETDataUtils.COLUMNS['company_group']].dropna().unique()
-            search_terms = search_query.lower().strip().split()
-
-            fallback_matches = []
-            for company in all_companies:
-                company_str = str(company).lower()
-
-                # Score based on how many search terms appear
-                matches = sum(1 for term in search_terms if term in company_str)
-                if matches > 0:
-                    score = (matches / len(search_terms)) * 100
-                    if score >= 50 and str(company) not in seen_companies:  # At least half the terms match
-                        match_info = f"{matches}/{len(search_terms)} terms matched"
-                        fallback_matches.append((str(company), match_info, "fallback", score))
-
-            # Sort by score and add top matches
-            fallback_matches.sort(key=lambda x: x[3], reverse=True)
-            for company_name, match_info, match_type, score in fallback_matches[:10]:
+            for company_name, match_info, match_type in get_company_index(checker).search(search_query, max_results):
                 if company_name not in seen_companies:
                     suggestions.append((company_name, match_info, match_type))
                     seen_companies.add(company_name)
+        except Exception as e:
+            st.error(f"Index search error: {e}")
 
+    # Method 3: Fuzzy matching only when the index left room for more results
+    if len(suggestions) < max_results and hasattr(checker, 'df_master'):
+        try:
+            index = get_company_index(checker)
+            fuzzy_matches = process.extract(
+                default_process(search_query), index.choices, scorer=fuzz.WRatio,
+                limit=max_results, score_cutoff=75
+            )
+            for _, confidence, company_id in fuzzy_matches:
+                fuzzy_company = index.names[company_id]
+                if fuzzy_company not in seen_companies:
+                    match_info = f"{confidence:.0f}% similarity"
+                    suggestions.append((fuzzy_company, match_info, "fuzzy_match"))
+                    seen_companies.add(fuzzy_company)
         except Exception as e:
-            st.error(f"Fallback search error: {e}")
+            st.error(f"Fuzzy matching error: {e}")
 
     # Sort suggestions by match type priority and limit results
     def sort_key(item):
@@ -287,6 +284,24 @@ def get_enhanced_company_suggestions(checker, search_query, max_results=9):
     return suggestions[:max_results]
 
 
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def _cached_company_suggestions(_checker, index_fingerprint, normalized_query, max_results):
+    """Memoized suggestions per (indexed company names, query); _checker is excluded from hashing"""
+    return get_enhanced_company_suggestions(_checker, normalized_query, max_results)
+
+
+def get_company_suggestions_cached(checker, search_query, max_results=9):
+    """Suggestions for a query, reusing results across reruns and repeated queries"""
+    # Matching is case- and whitespace-insensitive, so equivalent queries share an entry
+    normalized_query = ' '.join(search_query.lower().split())
+    if len(normalized_query) < 2:
+        return []
+    # Keyed on the indexed names, not id(checker): the cache is process-wide and ids of
+    # collected session checkers are reused, which would serve another dataset's names
+    return _cached_company_suggestions(checker, get_company_index(checker).fingerprint,
+                                       normalized_query, max_results)
+
+
 def handle_database_loading():
     """Handle database loading logic with proper error handling for both FET and World Bank databases"""
     # Only attempt loading once per session
@@ -11,16 +11,17 @@ import logging
 
 from fet_translation import TranslationManager
 from fet_utils import FETDataUtils
-from wb_sanctions import WorldBankSanctionsHandler  # NEW IMPORT
+from wb_sanctions import WorldBankSanctionsHandler, get_wb_handler
 
 # Enhanced fuzzy matching (optional)
 try:
-    from fuzzywuzzy import fuzz, process
+    from rapidfuzz import fuzz, process
+    from rapidfuzz.utils import default_process
 
     FUZZY_AVAILABLE = True
 except ImportError:
     FUZZY_AVAILABLE = False
-    st.warning("⚠️ fuzzywuzzy not available - fuzzy matching disabled")
+    st.warning("⚠️ rapidfuzz not available - fuzzy matching disabled")
 
 # Import recommendation engine
 try:
@@ -44,6 +45,7 @@ class FETCoreEngine:
         self.company_lookup = {}
         self.percentile_thresholds = {'50th': 1.0, '80th': 2.0}
         self.preprocessing_done = False
+        self.database_file = None  # Local FET workbook used by the last load, if any
 
         # Initialize recommendation engine
         self.recommendation_engine = RecommendationEngine()
@@ -51,15 +53,16 @@ class FETCoreEngine:
         # Initialize translation manager
         self.translator = TranslationManager(app_dir)
 
-        # NEW: Initialize World Bank sanctions handler
-        self.wb_sanctions = WorldBankSanctionsHandler(app_dir)
+        # World Bank sanctions handler for the default list, shared across checkers and sessions
+        # (use_wb_upload swaps in a private one for an uploaded list)
+        self.wb_sanctions = get_wb_handler(app_dir)
 
         # Cache management
         self.cache_dir = app_dir / "cache"
         self.cache_dir.mkdir(exist_ok=True)
 
         # Cache versioning (increment when data structure changes)
-        self.CACHE_VERSION = "v2.3"  # Updated version for dual database
+        self.CACHE_VERSION = "v2.6"  # Stacked legal suffixes stripped in list order again
 
         # Cache file paths
         self.cache_files = {
@@ -268,7 +271,7 @@ class FETCoreEngine:
                 return None
 
             # Step 1.5: Load World Bank sanctions
-            wb_loaded = self.wb_sanctions.load_wb_sanctions(wb_file_data)
+            wb_loaded = self.use_wb_upload(wb_file_data) if wb_file_data else self.wb_sanctions.load_wb_sanctions()
             wb_stats = self.wb_sanctions.get_stats()
 
             # Step 2: Full preprocessing (the expensive part that we want to cache!)
@@ -279,10 +282,8 @@ class FETCoreEngine:
 
             # Normalize company names
             company_col = COLUMNS['company_group']
-            df_loaded[f'{company_col}_normalized'] = (
-                df_loaded[company_col]
-                .astype(str)
-                .apply(FETDataUtils.normalize_company_name)
+            df_loaded[f'{company_col}_normalized'] = FETDataUtils.normalize_company_name_series(
+                df_loaded[company_col].astype(str)
             )
 
             # Create display-friendly date column
@@ -327,20 +328,8 @@ class FETCoreEngine:
             )
 
             # Canonicalize motivations and categories (expensive!)
-            df_loaded['motivation_canonical'] = df_loaded.apply(
-                lambda row: FETDataUtils.canonicalize_motivation(
-                    row['motivation_en'],
-                    row['main_category_en'],
-                    row['sub_category_en'],
-                    row[COLUMNS['source']]
-                ), axis=1
-            )
-
-            df_loaded['category_canonical'] = df_loaded.apply(
-                lambda row: FETDataUtils.canonicalize_category(
-                    row['main_category_en'],
-                    row['motivation_en']
-                ), axis=1
+            df_loaded['motivation_canonical'], df_loaded['category_canonical'] = (
+                FETDataUtils.canonicalize_all(df_loaded)
             )
 
             # Calculate recency
@@ -381,6 +370,14 @@ class FETCoreEngine:
             logger.exception("Full error details:")
             return None
 
+    def use_wb_upload(self, wb_file_data: bytes) -> bool:
+        """Check this engine against an uploaded WB list, held by this engine only (not the shared handler)."""
+        handler = WorldBankSanctionsHandler(self.app_dir, warm_from_cache=False)
+        if not handler.load_wb_sanctions(wb_file_data):
+            return False
+        self.wb_sanctions = handler
+        return True
+
     def clear_cache(self):
         """Clear all persistent cache files (use when data structure changes)."""
         try:
@@ -390,6 +387,9 @@ class FETCoreEngine:
                     cache_file.unlink()
                     files_removed += 1
 
+            # Also clear the Parquet copies of parsed workbooks, or the next load skips the re-parse
+            files_removed += FETDataUtils.clear_parquet_cache([self.database_file])
+
             # Also clear WB cache
             self.wb_sanctions.clear_cache()
 
@@ -459,6 +459,8 @@ class FETCoreEngine:
                 # st.info(f"📋 Found World Bank sanctioned individuals file: {sanctioned_file}")
                 break
 
+        self.database_file = database_file
+
         if database_file is None:
             st.warning(f"📂 FET Database file not found in expected locations:")
             for file_path in possible_files[:3]:  # Show first few paths
@@ -558,7 +560,10 @@ class FETCoreEngine:
 
         for scorer, method_name in methods:
             try:
-                match = process.extractOne(normalized_query, company_names, scorer=scorer)
+                # Cutoff lets RapidFuzz skip candidates that cannot beat the current best
+                match = process.extractOne(normalized_query, company_names, scorer=scorer,
+                                           processor=default_process,
+                                           score_cutoff=max(threshold, best_score))
                 if match and match[1] > best_score and match[1] >= threshold:
                     best_match = match
                     best_score = match[1]
@@ -570,7 +575,7 @@ class FETCoreEngine:
             matched_rows = self.company_lookup[best_match[0]]
             if matched_rows:
                 original_name = self.df_master.iloc[matched_rows[0]][FETDataUtils.COLUMNS['company_group']]
-                return original_name, best_match[1]
+                return original_name, round(best_match[1])
 
         return None
 
@@ -723,6 +728,8 @@ class FETCoreEngine:
                     value = row.get(col_name)
                     if pd.notna(value):
                         detail[key] = value
+                # Precomputed once here so scoring reruns don't rebuild it
+                detail['_severity_text'] = FETDataUtils.severity_text(detail)
                 exclusion_details.append(detail)
 
         # NEW: Add World Bank details if found
@@ -784,7 +791,7 @@ class FETCoreEngine:
         company_data = company_data.copy()
 
         # Calculate row scores
-        company_data['row_score'] = company_data.apply(FETDataUtils.calculate_row_score, axis=1)
+        company_data['row_score'] = FETDataUtils.calculate_row_scores_vec(company_data)
         base_score = company_data['row_score'].sum()
 
         # Calculate consensus multipliers
@@ -937,10 +944,8 @@ class FETCoreEngine:
 
             # Normalize company names
             company_col = COLUMNS['company_group']
-            df_merged[f'{company_col}_normalized'] = (
-                df_merged[company_col]
-                .astype(str)
-                .apply(FETDataUtils.normalize_company_name)
+            df_merged[f'{company_col}_normalized'] = FETDataUtils.normalize_company_name_series(
+                df_merged[company_col].astype(str)
             )
 
             # Create display-friendly date column
@@ -984,20 +989,8 @@ class FETCoreEngine:
             )
 
             # Canonicalize motivations and categories
-            df_merged['motivation_canonical'] = df_merged.apply(
-                lambda row: FETDataUtils.canonicalize_motivation(
-                    row['motivation_en'],
-                    row['main_category_en'],
-                    row['sub_category_en'],
-                    row[COLUMNS['source']]
-                ), axis=1
-            )
-
-            df_merged['category_canonical'] = df_merged.apply(
-                lambda row: FETDataUtils.canonicalize_category(
-                    row['main_category_en'],
-                    row['motivation_en']
-                ), axis=1
+            df_merged['motivation_canonical'], df_merged['category_canonical'] = (
+                FETDataUtils.canonicalize_all(df_merged)
             )
 
             # Calculate recency
@@ -1311,12 +1304,13 @@ class FETCoreEngine:
             try:
                 all_companies = [str(c) for c in self.df_master[FETDataUtils.COLUMNS['company_group']].unique() if
                                  pd.notna(c)]
-                fuzzy_matches = process.extract(company_name, all_companies, limit=5, scorer=fuzz.partial_ratio)
+                fuzzy_matches = process.extract(company_name, all_companies, limit=5, scorer=fuzz.partial_ratio,
+                                                processor=default_process, score_cutoff=60)
 
                 if fuzzy_matches:
-                    for match, score in fuzzy_matches:
+                    for match, score, _ in fuzzy_matches:
                         if score >= 60:
-                            st.write(f"- {match} (similarity: {score}%)")
+                            st.write(f"- {match} (similarity: {score:.0f}%)")
                 else:
                     st.write("No good fuzzy matches found in FET")
             except Exception as e:
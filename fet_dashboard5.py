@@ -166,7 +166,7 @@ def calculate_business_risk_score(result):
     exclusion_details = result['exclusion_details']
 
     # Handle case with no exclusions early
-    if not exclusion_details or len(exclusion_details) == 0:
+    if not exclusion_details:
         return {
             'final_score': 0,
             'consensus_score': 0,
@@ -183,20 +183,6 @@ def calculate_business_risk_score(result):
     df_details = pd.DataFrame(exclusion_details)
     total_exclusions = len(exclusion_details)
 
-    if total_exclusions == 0:  # Double-check
-        return {
-            'final_score': 0,
-            'consensus_score': 0,
-            'consensus_desc': 'No Exclusions Found',
-            'severity_score': 0,
-            'severity_desc': 'No Issues Identified',
-            'recency_score': 0,
-            'recency_desc': 'No Recent Activity',
-            'scope_score': 0,
-            'scope_desc': 'No Exclusions',
-            'breakdown': "No exclusions found - company appears clear for engagement"
-        }
-
     # Factor 1: Consensus Strength (40% weight)
     investors = factors.get('unique_investors', 0)
     countries = factors.get('unique_countries', 0)
@@ -7,13 +7,49 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Set
 import re
 from collections import defaultdict
+from functools import lru_cache
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"[A-Za-zÀ-ÿ']+")
+
+# Common function words from major European languages
+_NON_EN_WORDS = frozenset({
+    # German
+    "und", "der", "die", "das", "mit", "für", "gegen", "wegen", "von", "zu", "im", "am",
+    # French
+    "et", "la", "le", "des", "aux", "pour", "contre", "de", "du", "dans", "sur", "avec",
+    # Spanish
+    "y", "de", "el", "los", "las", "por", "con", "en", "del", "al", "para",
+    # Italian
+    "e", "di", "il", "la", "lo", "gli", "le", "per", "con", "in", "del", "alla",
+    # Dutch
+    "en", "van", "het", "de", "voor", "met", "op", "aan", "door", "bij",
+    # Norwegian/Danish/Swedish
+    "og", "av", "til", "for", "med", "på", "i", "som", "det", "er"
+})
+
+
+@lru_cache(maxsize=50_000)
+def _has_foreign_words(s_lower: str) -> bool:
+    """True if lowercased text contains a common non-English function word"""
+    return any(tok in _NON_EN_WORDS for tok in _TOKEN_RE.findall(s_lower))
+
 
 class TranslationManager:
     """
@@ -27,6 +63,11 @@ class TranslationManager:
         self.cache_path = app_dir / "motivation_translation_cache.json"
         self.cache = self._load_cache()
 
+        self._dirty = False
+
+        # English-looking texts map to themselves; remembered in memory only
+        self._identity_seen: Set[str] = set()
+
         # Backends: decide what's available from env
         self.use_deepl = bool(os.environ.get("DEEPL_API_KEY"))
         self.use_google = bool(os.environ.get("GOOGLE_TRANSLATE_API_KEY"))
@@ -35,6 +76,10 @@ class TranslationManager:
         self.last_api_call = 0
         self.min_interval = 0.1  # Minimum seconds between API calls
 
+        # Guards the rate limiter and counters when translating concurrently
+        self._lock = threading.Lock()
+        self.max_workers = max(1, int(os.environ.get("FET_TRANSLATE_WORKERS", "8")))
+
         # Enhanced error tracking
         self.api_errors = 0
         self.max_errors = 5  # Stop after 5 consecutive errors
@@ -43,6 +88,9 @@ class TranslationManager:
         self.max_calls = int(os.environ.get("FET_TRANSLATE_MAX", "500"))
         self.calls_made = 0
 
+        # One pooled session so TCP/TLS connections are reused across calls
+        self._session = self._build_session()
+
         # Enhanced seed dictionary for frequent phrases (extend as you learn your data)
         self.seed_map = {
             # Norwegian/Danish/Swedish
@@ -128,88 +176,110 @@ class TranslationManager:
             "esg": "environmental social governance",
         }
 
+        # Memoized seed scan, bound to this instance's seed_map
+        self._seed_lookup_cached = lru_cache(maxsize=50_000)(self._scan_seed_map)
+
     # ----------------- Public API -----------------
     def translate_series(self, s: pd.Series) -> pd.Series:
-        """Translate a pandas Series of text values"""
-        return s.astype(str).fillna("").apply(self.translate_text)
+        """Translate a pandas Series of text values (each distinct value once)"""
+        texts = s.astype(str).fillna("")
+
+        translations = {}
+        pending = {}  # original value -> stripped text that needs an online lookup
+        for text in pd.unique(texts):
+            t, local = self._translate_local(text)
+            if local is None:
+                pending[text] = t
+            else:
+                translations[text] = local
+
+        if pending:
+            translations.update(self._translate_pending(pending))
+
+        self._flush()
+        return texts.map(translations)
 
     def translate_text(self, text: str) -> str:
         """Translate a single text value"""
-        t = str(text).strip()
-        if not t or t.lower() in ['nan', 'none', '']:
-            return ""
-
-        # 1) Cached?
-        if t in self.cache:
-            return self.cache[t]
+        t, local = self._translate_local(text)
+        if local is not None:
+            self._flush()
+            return local
 
         # Check if we've hit too many errors
         if self.api_errors >= self.max_errors:
             logger.warning("Translation API temporarily disabled due to errors")
             return t
 
-        # Apply rate limiting
-        time_since_last = time.time() - self.last_api_call
-        if time_since_last < self.min_interval:
-            time.sleep(self.min_interval - time_since_last)
+        # 4) Online translation (optional), 5) falling back to the original
+        self.cache[t] = self._translate_online(t) or t
+        self._dirty = True
+        self._flush()
+        return self.cache[t]
+
+    # ----------------- Helper Methods -----------------
+    def _translate_local(self, text: str) -> Tuple[str, Optional[str]]:
+        """Resolve text without network calls; None means it needs an online lookup"""
+        t = str(text).strip()
+        t_lower = t.lower()
+        if not t or t_lower in ['nan', 'none', '']:
+            return t, ""
+
+        # 1) Cached?
+        if t in self._identity_seen:
+            return t, t
+        if t in self.cache:
+            return t, self.cache[t]
 
         # 2) Seed dictionary (case-insensitive contains)
-        mapped = self._seed_lookup(t)
+        mapped = self._seed_lookup(t, t_lower)
         if mapped:
             self.cache[t] = mapped
-            self._persist()
-            return mapped
+            self._dirty = True
+            return t, mapped
 
         # 3) Heuristic: looks English-ish? then return as is
-        if not self._looks_foreign(t):
-            self.cache[t] = t
-            self._persist()
-            return t
+        if not self._looks_foreign(t, t_lower):
+            self._identity_seen.add(t)
+            return t, t
 
-        # 4) Online translation (optional)
-        translated = self._translate_online(t)
-        if translated and translated != t:
-            self.cache[t] = translated
-            self._persist()
-            return translated
+        return t, None
+
+    def _translate_pending(self, pending: Dict[str, str]) -> Dict[str, str]:
+        """Translate foreign texts online concurrently (HTTP-bound, so threads overlap)"""
+        if self.api_errors >= self.max_errors:
+            logger.warning("Translation API temporarily disabled due to errors")
+            return dict(pending)
 
-        # 5) Fallback: return original
-        self.cache[t] = t
-        self._persist()
-        return t
+        foreign = list(dict.fromkeys(pending.values()))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = dict(zip(foreign, executor.map(self._translate_online, foreign)))
 
-    # ----------------- Helper Methods -----------------
-    def _looks_foreign(self, s: str) -> bool:
-        """Heuristic to detect if text looks foreign"""
-        # Check for non-ASCII characters (accented characters, etc.)
-        if any(ord(ch) > 127 for ch in s):
-            return True
+        for t, translated in results.items():
+            self.cache[t] = translated or t
+        self._dirty = True
 
-        # Check for common non-English function words
-        tokens = re.findall(r"[A-Za-zÀ-ÿ']+", s.lower())
+        return {text: self.cache[t] for text, t in pending.items()}
 
-        # Common function words from major European languages
-        NON_EN = {
-            # German
-            "und", "der", "die", "das", "mit", "für", "gegen", "wegen", "von", "zu", "im", "am",
-            # French
-            "et", "la", "le", "des", "aux", "pour", "contre", "de", "du", "dans", "sur", "avec",
-            # Spanish
-            "y", "de", "el", "los", "las", "por", "con", "en", "del", "al", "para",
-            # Italian
-            "e", "di", "il", "la", "lo", "gli", "le", "per", "con", "in", "del", "alla",
-            # Dutch
-            "en", "van", "het", "de", "voor", "met", "op", "aan", "door", "bij",
-            # Norwegian/Danish/Swedish
-            "og", "av", "til", "for", "med", "på", "i", "som", "det", "er"
-        }
+    def _looks_foreign(self, s: str, s_lower: Optional[str] = None) -> bool:
+        """Heuristic to detect if text looks foreign (s_lower: pre-lowered s, if known)"""
+        # Any non-ASCII character (accents, other scripts) - one C-level scan
+        if not s.isascii():
+            return True
 
-        return any(tok in NON_EN for tok in tokens)
+        # Check for common non-English function words
+        if s_lower is None:
+            s_lower = s.lower()
+        return _has_foreign_words(s_lower)
 
-    def _seed_lookup(self, s: str) -> str:
+    def _seed_lookup(self, s: str, s_lower: Optional[str] = None) -> str:
         """Look up text in seed dictionary (case-insensitive substring matching)"""
-        s_lower = s.lower()
+        if s_lower is None:
+            s_lower = s.lower()
+        return self._seed_lookup_cached(s_lower)
 
+    def _scan_seed_map(self, s_lower: str) -> str:
+        """Exact, then substring match of lowercased text against the seed map"""
         # First try exact matches
         if s_lower in self.seed_map:
             return self.seed_map[s_lower]
@@ -223,71 +293,73 @@ class TranslationManager:
 
     def _translate_online(self, s: str) -> str:
         """Enhanced online translation with better error handling"""
-        if self.calls_made >= self.max_calls or self.api_errors >= self.max_errors:
-            return ""
+        # Reserve a call slot up front so concurrent workers cannot overshoot max_calls
+        with self._lock:
+            if self.calls_made >= self.max_calls or self.api_errors >= self.max_errors:
+                return ""
+            self.calls_made += 1
 
+        result = ""
         try:
-            self.last_api_call = time.time()
-
             if self.use_deepl:
+                self._throttle()
                 result = self._translate_deepl(s)
-                if result:
-                    self.api_errors = 0  # Reset error counter on success
-                    return result
             elif self.use_google:
+                self._throttle()
                 result = self._translate_google(s)
-                if result:
-                    self.api_errors = 0  # Reset error counter on success
-                    return result
 
         except Exception as e:
-            self.api_errors += 1
-            logger.warning(f"Translation API error #{self.api_errors}: {e}")
-
-        return ""
+            with self._lock:
+                self.api_errors += 1
+                errors = self.api_errors
+            logger.warning(f"Translation API error #{errors}: {e}")
+
+        with self._lock:
+            if result:
+                self.api_errors = 0  # Reset error counter on success
+            else:
+                self.calls_made -= 1  # Only successful calls count against the limit
+        return result
+
+    def _throttle(self):
+        """Space API calls at least min_interval apart across threads"""
+        # Claim the next free send time under the lock, then sleep outside it
+        with self._lock:
+            now = time.time()
+            send_at = max(now, self.last_api_call + self.min_interval)
+            self.last_api_call = send_at
+        if send_at > now:
+            time.sleep(send_at - now)
 
     def _translate_deepl(self, text: str) -> str:
-        """Translate using DeepL API with retry logic"""
-        max_retries = 3
-
-        for attempt in range(max_retries):
-            try:
-                auth_key = os.environ["DEEPL_API_KEY"]
-                is_free = auth_key.endswith(":fx")
-                base_url = "https://api-free.deepl.com" if is_free else "https://api.deepl.com"
-
-                response = requests.post(
-                    f"{base_url}/v2/translate",
-                    data={
-                        "text": text,
-                        "target_lang": "EN",
-                        "source_lang": "auto"
-                    },
-                    headers={"Authorization": f"DeepL-Auth-Key {auth_key}"},
-                    timeout=10
-                )
-
-                if response.ok:
-                    self.calls_made += 1
-                    data = response.json()
-                    translated = data["translations"][0]["text"]
-                    return translated.strip()
-                elif response.status_code == 429:  # Rate limited
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    logger.warning(f"Rate limited, waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    logger.warning(f"DeepL API error: {response.status_code} - {response.text}")
-                    break
-
-            except requests.exceptions.Timeout:
-                logger.warning(f"DeepL timeout on attempt {attempt + 1}/{max_retries}")
-                if attempt < max_retries - 1:
-                    continue
-            except Exception as e:
-                logger.warning(f"DeepL translation error on attempt {attempt + 1}: {e}")
-                break
+        """Translate using DeepL API (retries/backoff handled by the session)"""
+        try:
+            auth_key = os.environ["DEEPL_API_KEY"]
+            is_free = auth_key.endswith(":fx")
+            base_url = "https://api-free.deepl.com" if is_free else "https://api.deepl.com"
+
+            response = self._session.post(
+                f"{base_url}/v2/translate",
+                data={
+                    "text": text,
+                    "target_lang": "EN",
+                    "source_lang": "auto"
+                },
+                headers={"Authorization": f"DeepL-Auth-Key {auth_key}"},
+                timeout=10
+            )
+
+            if response.ok:
+                data = response.json()
+                translated = data["translations"][0]["text"]
+                return translated.strip()
+
+            logger.warning(f"DeepL API error: {response.status_code} - {response.text}")
+
+        except requests.exceptions.Timeout:
+            logger.warning("DeepL timeout")
+        except Exception as e:
+            logger.warning(f"DeepL translation error: {e}")
 
         return ""
 
@@ -296,7 +368,7 @@ class TranslationManager:
         try:
             api_key = os.environ["GOOGLE_TRANSLATE_API_KEY"]
 
-            response = requests.post(
+            response = self._session.post(
                 f"https://translation.googleapis.com/language/translate/v2?key={api_key}",
                 json={
                     "q": text,
@@ -307,7 +379,6 @@ class TranslationManager:
             )
 
             if response.ok:
-                self.calls_made += 1
                 data = response.json()
                 translated = data["data"]["translations"][0]["translatedText"]
                 return translated.strip()
@@ -317,21 +388,48 @@ class TranslationManager:
 
         return ""
 
+    @staticmethod
+    def _build_session() -> requests.Session:
+        """Create a keep-alive session with a connection pool and retry policy"""
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        return session
+
     def _load_cache(self) -> dict:
         """Load translation cache from disk"""
         try:
             if self.cache_path.exists():
+                if ORJSON_AVAILABLE:
+                    return orjson.loads(self.cache_path.read_bytes())
                 with open(self.cache_path, 'r', encoding='utf-8') as f:
                     return json.load(f)
         except Exception as e:
             logger.warning(f"Failed to load translation cache: {e}")
         return {}
 
+    def _flush(self):
+        """Persist the cache only if it changed since the last write"""
+        if self._dirty:
+            self._persist()
+            self._dirty = False
+
     def _persist(self):
         """Persist translation cache to disk"""
         try:
+            if ORJSON_AVAILABLE:
+                self.cache_path.write_bytes(orjson.dumps(self.cache))
+                return
             with open(self.cache_path, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+                json.dump(self.cache, f, ensure_ascii=False, separators=(',', ':'))
         except Exception as e:
             logger.warning(f"Failed to persist translation cache: {e}")
 
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import re
 import io
+import hashlib
 import requests
 import streamlit as st
 from pathlib import Path
@@ -12,6 +13,21 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _compile_keyword_groups(mapping: Dict[str, list]) -> Tuple[re.Pattern, Dict[str, str]]:
+    """
+    Compile a canonical -> keywords mapping into one regex with a named group per
+    canonical value. Each group sits in its own lookahead so alternatives are tried
+    in mapping order, preserving the first-canonical-wins semantics of the old loop.
+    """
+    group_to_canon = {}
+    branches = []
+    for canonical, keywords in mapping.items():
+        group = canonical.replace(' ', '_').replace('&', 'and').replace('-', '_')
+        group_to_canon[group] = canonical
+        branches.append(f"(?=.*?(?P<{group}>{'|'.join(map(re.escape, keywords))}))")
+    return re.compile('^(?:' + '|'.join(branches) + ')', re.DOTALL), group_to_canon
+
+
 class FETDataUtils:
     """Utility class for FET data processing operations."""
 
@@ -103,12 +119,113 @@ class FETDataUtils:
         'controversial behaviour': ['controversial behaviour', 'controversial behavior']
     }
 
+    # Compiled keyword alternations used by the vectorized canonicalizers
+    MOTIVATION_RE, _MOTIVATION_GROUPS = _compile_keyword_groups(MOTIVATION_MAPPING)
+    CATEGORY_RE, _CATEGORY_GROUPS = _compile_keyword_groups(CATEGORY_MAPPING)
+
+    # Legal suffixes stripped from the end of company names
+    LEGAL_SUFFIXES = [
+        'inc', 'incorporated', 'corp', 'corporation', 'ltd', 'limited',
+        'llc', 'plc', 'sa', 'ag', 'gmbh', 'bv', 'nv', 'spa', 'srl',
+        'co', 'company', 'group', 'holding', 'holdings', 'international',
+        'global', 'worldwide', 'enterprises', 'solutions'
+    ]
+
+    # Precompiled patterns shared by the normalization and date helpers
+    _ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+    _YEAR = re.compile(r'\b(20\d{2})\b')
+    _NONWORD = re.compile(r'[^\w\s&-]')
+    _WS = re.compile(r'\s+')
+    # One pattern per legal suffix, applied in LEGAL_SUFFIXES order: stacked suffixes are
+    # stripped only while each comes later in the list than the one before it, so
+    # "energy group co ltd" -> "energy" but "seven group holdings" -> "seven group"
+    _SUFFIXES = tuple(re.compile(rf'\b{re.escape(suffix)}\.?\s*$') for suffix in LEGAL_SUFFIXES)
+    # Any legal suffix at the end; names without one skip the per-suffix passes
+    _SUFFIX = re.compile(
+        r'\b(?:' + '|'.join(map(re.escape, sorted(LEGAL_SUFFIXES, key=len, reverse=True)))
+        + r')\.?\s*$'
+    )
+
+    # On-disk Parquet copies of parsed Excel sources (uploads/remote files keyed by content hash)
+    PARQUET_CACHE_DIR = Path(__file__).parent / "cache"
+    PARQUET_CACHE_MAX_FILES = 8  # Content-hashed copies kept; least recently used go first
+
+    @staticmethod
+    def _read_parquet_cache(cache_path: Path) -> Optional[pd.DataFrame]:
+        """Read a Parquet cache file, returning None if it is missing or unreadable."""
+        try:
+            if cache_path.exists():
+                return pd.read_parquet(cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to read Parquet cache {cache_path.name}: {e}")
+        return None
+
+    @staticmethod
+    def _write_parquet_cache(df: pd.DataFrame, cache_path: Path):
+        """Write a Parquet cache file; failures only cost the next load a re-parse."""
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            df.to_parquet(cache_path, index=False)
+        except Exception as e:
+            logger.warning(f"Failed to write Parquet cache {cache_path.name}: {e}")
+
+    @staticmethod
+    def _read_excel_bytes_cached(content: bytes, dtype_spec: Dict) -> pd.DataFrame:
+        """Parse Excel bytes, reusing a Parquet copy keyed by the content hash."""
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        cache_path = FETDataUtils.PARQUET_CACHE_DIR / f"excel_{digest}.parquet"
+
+        df = FETDataUtils._read_parquet_cache(cache_path)
+        if df is None:
+            df = pd.read_excel(io.BytesIO(content), engine='openpyxl', dtype=dtype_spec)
+            FETDataUtils._write_parquet_cache(df, cache_path)
+            FETDataUtils._prune_parquet_cache()
+        else:
+            # Refresh the mtime so pruning evicts by last use rather than by creation
+            try:
+                cache_path.touch()
+            except OSError:
+                pass
+        return df
+
+    @staticmethod
+    def _prune_parquet_cache():
+        """Drop the least recently used content-hashed Parquet copies beyond the size limit."""
+        try:
+            cached = sorted(FETDataUtils.PARQUET_CACHE_DIR.glob("excel_*.parquet"),
+                            key=lambda p: p.stat().st_mtime, reverse=True)
+            for stale in cached[FETDataUtils.PARQUET_CACHE_MAX_FILES:]:
+                stale.unlink(missing_ok=True)
+                logger.info(f"Evicted Parquet cache file: {stale.name}")
+        except Exception as e:
+            logger.warning(f"Failed to prune Parquet cache: {e}")
+
+    @staticmethod
+    def clear_parquet_cache(source_files=()) -> int:
+        """Remove all Parquet copies of parsed Excel sources so the next load re-parses them."""
+        targets = list(FETDataUtils.PARQUET_CACHE_DIR.glob("excel_*.parquet"))
+        targets += [Path(source).with_suffix('.parquet') for source in source_files if source]
+
+        files_removed = 0
+        for cache_path in targets:
+            try:
+                if cache_path.exists():
+                    cache_path.unlink()
+                    files_removed += 1
+            except Exception as e:
+                logger.warning(f"Failed to remove Parquet cache {cache_path.name}: {e}")
+
+        # The in-memory copy would otherwise keep serving the old parse
+        FETDataUtils.load_dataframe_from_file.clear()
+        return files_removed
+
     @staticmethod
     @st.cache_data(ttl=3600)
     def load_dataframe_from_file(file_path: str = None, file_data: bytes = None,
                                  source_url: str = None) -> pd.DataFrame:
         """
-        Load dataframe from file with date columns preserved as strings
+        Load dataframe from file with date columns preserved as strings.
+        Parsed workbooks are cached as Parquet so openpyxl only runs when the source changes.
         """
         # Force date columns to be read as strings to preserve Excel formatting
         dtype_spec = {
@@ -118,11 +235,19 @@ class FETDataUtils:
 
         if file_path and Path(file_path).exists():
             try:
+                source = Path(file_path)
+                cache_path = source.with_suffix('.parquet')
+                if cache_path.exists() and cache_path.stat().st_mtime >= source.stat().st_mtime:
+                    df = FETDataUtils._read_parquet_cache(cache_path)
+                    if df is not None:
+                        return df
+
                 df = pd.read_excel(
                     file_path,
                     engine='openpyxl',
                     dtype=dtype_spec
                 )
+                FETDataUtils._write_parquet_cache(df, cache_path)
                 return df
             except Exception as e:
                 raise Exception(f"Failed to load local file: {e}")
@@ -131,23 +256,13 @@ class FETDataUtils:
             try:
                 response = requests.get(source_url, timeout=120)
                 response.raise_for_status()
-                df = pd.read_excel(
-                    io.BytesIO(response.content),
-                    engine='openpyxl',
-                    dtype=dtype_spec
-                )
-                return df
+                return FETDataUtils._read_excel_bytes_cached(response.content, dtype_spec)
             except Exception as e:
                 raise Exception(f"Failed to load remote file: {e}")
 
         elif file_data:
             try:
-                df = pd.read_excel(
-                    io.BytesIO(file_data),
-                    engine='openpyxl',
-                    dtype=dtype_spec
-                )
-                return df
+                return FETDataUtils._read_excel_bytes_cached(file_data, dtype_spec)
             except Exception as e:
                 raise Exception(f"Failed to load uploaded file: {e}")
 
@@ -162,22 +277,34 @@ class FETDataUtils:
 
         name = str(name).strip().lower()
 
-        legal_suffixes = [
-            'inc', 'incorporated', 'corp', 'corporation', 'ltd', 'limited',
-            'llc', 'plc', 'sa', 'ag', 'gmbh', 'bv', 'nv', 'spa', 'srl',
-            'co', 'company', 'group', 'holding', 'holdings', 'international',
-            'global', 'worldwide', 'enterprises', 'solutions'
-        ]
-
-        for suffix in legal_suffixes:
-            pattern = rf'\b{re.escape(suffix)}\.?\s*$'
-            name = re.sub(pattern, '', name)
-
-        name = re.sub(r'[^\w\s&-]', ' ', name)
-        name = re.sub(r'\s+', ' ', name)
+        if FETDataUtils._SUFFIX.search(name):
+            for suffix in FETDataUtils._SUFFIXES:
+                name = suffix.sub('', name)
+        name = FETDataUtils._NONWORD.sub(' ', name)
+        name = FETDataUtils._WS.sub(' ', name)
 
         return name.strip()
 
+    @staticmethod
+    def normalize_company_name_series(names: pd.Series) -> pd.Series:
+        """Vectorized normalize_company_name for a whole column of names."""
+        names = names.fillna('').astype(str).astype(object).str.strip().str.lower()
+
+        # Same ordered per-suffix passes as the scalar path, run only on names that end in a suffix
+        has_suffix = names.str.contains(FETDataUtils._SUFFIX)
+        if has_suffix.any():
+            stripped = names[has_suffix]
+            for suffix in FETDataUtils._SUFFIXES:
+                stripped = stripped.str.replace(suffix, '', regex=True)
+            names = names.where(~has_suffix, stripped)
+
+        return (
+            names
+            .str.replace(FETDataUtils._NONWORD, ' ', regex=True)
+            .str.replace(FETDataUtils._WS, ' ', regex=True)
+            .str.strip()
+        )
+
     @staticmethod
     def format_date_for_display(date_value) -> str:
         """Format date value for display."""
@@ -186,18 +313,18 @@ class FETDataUtils:
 
         date_str = str(date_value).strip()
 
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
+        if FETDataUtils._ISO_DATE.match(date_str):
             return date_str
 
         if ';' in date_str:
             dates = [d.strip() for d in date_str.split(';') if d.strip()]
-            if dates and re.match(r'^\d{4}-\d{2}-\d{2}$', dates[0]):
+            if dates and FETDataUtils._ISO_DATE.match(dates[0]):
                 if len(dates) > 1:
                     return f"{dates[0]} (+{len(dates) - 1} more)"
                 else:
                     return dates[0]
 
-        year_match = re.search(r'\b(20\d{2})\b', date_str)
+        year_match = FETDataUtils._YEAR.search(date_str)
         if year_match:
             return str(year_match.group())
 
@@ -216,15 +343,15 @@ class FETDataUtils:
 
         date_str = str(date_value).strip()
 
-        if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
+        if FETDataUtils._ISO_DATE.match(date_str):
             return int(date_str[:4])
 
         if ';' in date_str:
             first_date = date_str.split(';')[0].strip()
-            if re.match(r'^\d{4}-\d{2}-\d{2}$', first_date):
+            if FETDataUtils._ISO_DATE.match(first_date):
                 return int(first_date[:4])
 
-        year_match = re.search(r'\b(20\d{2})\b', date_str)
+        year_match = FETDataUtils._YEAR.search(date_str)
         if year_match:
             return int(year_match.group())
 
@@ -273,6 +400,98 @@ class FETDataUtils:
 
         return 'unspecified'
 
+    @staticmethod
+    def severity_text(record: Dict) -> str:
+        """Lowercased motivation/category text of an exclusion record, used for severity keywords."""
+        return ' '.join(
+            str(record[key]) for key in ('motivation_canonical', 'main_category', 'motivation')
+            if record.get(key) is not None
+        ).lower()
+
+    @staticmethod
+    def _text_series(values: pd.Series) -> pd.Series:
+        """Stringify a column the way an f-string would (NaN -> 'nan') as object dtype."""
+        return values.map(str).astype(object)
+
+    @staticmethod
+    def _extract_keyword_groups(combined: pd.Series, pattern: re.Pattern,
+                                group_to_canon: Dict[str, str]) -> pd.Series:
+        """Map each text to its canonical keyword group, NaN where nothing matched."""
+        # Exclusion texts repeat heavily, so match each distinct text only once
+        uniques = pd.Series(pd.unique(combined), dtype=object)
+        hits = uniques.str.extract(pattern).notna()
+        canonical = hits.idxmax(axis=1).map(group_to_canon).where(hits.any(axis=1))
+        return combined.map(dict(zip(uniques, canonical)))
+
+    @staticmethod
+    def _motivation_from_combined(combined: pd.Series, motivation_lower: pd.Series) -> pd.Series:
+        """Canonical motivation from lowered combined text, falling back to the motivation itself."""
+        canonical = FETDataUtils._extract_keyword_groups(
+            combined, FETDataUtils.MOTIVATION_RE, FETDataUtils._MOTIVATION_GROUPS
+        )
+
+        # Fall back to the raw motivation text, or 'unspecified' when empty
+        fallback = motivation_lower.str.strip()
+        fallback = fallback.where(fallback != '', 'unspecified')
+        return canonical.fillna(fallback)
+
+    @staticmethod
+    def _category_from_combined(combined: pd.Series) -> pd.Series:
+        """Canonical category from lowered combined text."""
+        canonical = FETDataUtils._extract_keyword_groups(
+            combined, FETDataUtils.CATEGORY_RE, FETDataUtils._CATEGORY_GROUPS
+        )
+        return canonical.fillna('unspecified')
+
+    @staticmethod
+    def canonicalize_motivation_series(motivation: pd.Series, category: pd.Series,
+                                       sub_category: pd.Series, source: pd.Series) -> pd.Series:
+        """Vectorized canonicalize_motivation over aligned columns."""
+        motivation = FETDataUtils._text_series(motivation.fillna(''))
+        combined = (
+            motivation + ' ' + FETDataUtils._text_series(category) + ' ' +
+            FETDataUtils._text_series(sub_category) + ' ' + FETDataUtils._text_series(source)
+        ).str.lower()
+        return FETDataUtils._motivation_from_combined(combined, motivation.str.lower())
+
+    @staticmethod
+    def canonicalize_category_series(category: pd.Series, motivation: pd.Series) -> pd.Series:
+        """Vectorized canonicalize_category over aligned columns."""
+        combined = (
+            FETDataUtils._text_series(category.fillna('')) + ' ' + FETDataUtils._text_series(motivation)
+        ).str.lower()
+        return FETDataUtils._category_from_combined(combined)
+
+    @staticmethod
+    def canonicalize_all(df: pd.DataFrame, motivation_col: str = 'motivation_en',
+                         category_col: str = 'main_category_en',
+                         sub_category_col: str = 'sub_category_en',
+                         source_col: Optional[str] = None) -> Tuple[pd.Series, pd.Series]:
+        """Canonical motivation and category columns in one pass over the text columns."""
+        source_col = source_col or FETDataUtils.COLUMNS['source']
+        text = FETDataUtils._text_series
+
+        # Lowercase each column once; both combined texts are built from these
+        motivation, category = df[motivation_col], df[category_col]
+        motivation_lower = text(motivation.fillna('')).str.lower()
+        category_lower = text(category.fillna('')).str.lower()
+        sub_category_lower = text(df[sub_category_col]).str.lower()
+        source_lower = text(df[source_col]).str.lower()
+
+        # The per-row functions format missing values as 'nan' in the secondary slots
+        motivation_as_secondary = motivation_lower.where(motivation.notna(), 'nan')
+        category_as_secondary = category_lower.where(category.notna(), 'nan')
+
+        motivation_combined = (
+            motivation_lower + ' ' + category_as_secondary + ' ' + sub_category_lower + ' ' + source_lower
+        )
+        category_combined = category_lower + ' ' + motivation_as_secondary
+
+        return (
+            FETDataUtils._motivation_from_combined(motivation_combined, motivation_lower),
+            FETDataUtils._category_from_combined(category_combined),
+        )
+
     @staticmethod
     def calculate_percentiles(df_master: pd.DataFrame) -> Dict:
         """Calculate percentile thresholds for risk scoring."""
@@ -284,66 +503,18 @@ class FETDataUtils:
 
         try:
             company_scores = {}
-            companies = df_master[FETDataUtils.COLUMNS['company_group']].unique()
-
-            for company in companies:
-                if pd.notna(company):
-                    company_data = df_master[df_master[FETDataUtils.COLUMNS['company_group']] == company].copy()
-
-                    # Calculate row scores
-                    def calculate_row_score(row):
-                        category = row.get('category_canonical', 'unspecified')
-                        category_weight = FETDataUtils.CATEGORY_WEIGHTS.get(category, 1.0)
-
-                        motivation = row.get('motivation_canonical', 'unspecified')
-                        motivation_weight = FETDataUtils.MOTIVATION_WEIGHTS.get(motivation, 1.0)
-
-                        scope = row.get('scope_normalized', 'company')
-                        scope_mult = 1.15 if scope == 'sector' else 1.0
-
-                        years_ago = row.get('years_ago', 0)
-                        if years_ago <= 1:
-                            recency_mult = 1.0
-                        elif years_ago <= 2:
-                            recency_mult = 0.9
-                        elif years_ago <= 5:
-                            recency_mult = 0.8
-                        else:
-                            recency_mult = 0.7
-
-                        return category_weight * motivation_weight * scope_mult * recency_mult
-
-                    company_data['row_score'] = company_data.apply(calculate_row_score, axis=1)
-                    base_score = company_data['row_score'].sum()
-
-                    # Calculate consensus multipliers
-                    unique_investors = company_data[FETDataUtils.COLUMNS['excluded_by']].dropna().nunique()
-                    unique_countries = company_data[FETDataUtils.COLUMNS['investor_country']].dropna().nunique()
-
-                    if unique_investors >= 20:
-                        investor_mult = 1.30
-                    elif unique_investors >= 10:
-                        investor_mult = 1.20
-                    elif unique_investors >= 5:
-                        investor_mult = 1.10
-                    elif unique_investors >= 2:
-                        investor_mult = 1.05
-                    else:
-                        investor_mult = 1.0
-
-                    if unique_countries >= 8:
-                        geo_mult = 1.25
-                    elif unique_countries >= 5:
-                        geo_mult = 1.15
-                    elif unique_countries >= 3:
-                        geo_mult = 1.10
-                    elif unique_countries >= 2:
-                        geo_mult = 1.05
-                    else:
-                        geo_mult = 1.0
-
-                    final_score = base_score * investor_mult * geo_mult
-                    company_scores[company] = final_score
+            company_col = FETDataUtils.COLUMNS['company_group']
+
+            # Score every row in one vectorized pass, then aggregate per company
+            row_scores = pd.Series(FETDataUtils.calculate_row_scores_vec(df_master), index=df_master.index)
+            base_scores = row_scores.groupby(df_master[company_col], sort=False).sum()
+
+            for company, company_data in df_master.groupby(company_col, sort=False):
+                # Calculate consensus multipliers
+                investor_mult, geo_mult = FETDataUtils.calculate_consensus_multipliers(company_data)
+
+                final_score = base_scores[company] * investor_mult * geo_mult
+                company_scores[company] = final_score
 
             # Calculate percentiles
             scores = [score for score in company_scores.values() if
@@ -422,6 +593,36 @@ class FETDataUtils:
         row_score = category_weight * motivation_weight * scope_mult * recency_mult
         return row_score
 
+    @staticmethod
+    def calculate_row_scores_vec(df: pd.DataFrame) -> np.ndarray:
+        """Vectorized calculate_row_score for every row of a DataFrame."""
+
+        def column(name: str, default) -> pd.Series:
+            return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+        # Category and motivation weights
+        category_weight = (
+            column('category_canonical', 'unspecified')
+            .map(FETDataUtils.CATEGORY_WEIGHTS).fillna(1.0).to_numpy(dtype=float)
+        )
+        motivation_weight = (
+            column('motivation_canonical', 'unspecified')
+            .map(FETDataUtils.MOTIVATION_WEIGHTS).fillna(1.0).to_numpy(dtype=float)
+        )
+
+        # Scope multiplier
+        scope_mult = np.where(column('scope_normalized', 'company').to_numpy() == 'sector', 1.15, 1.0)
+
+        # Recency multiplier (NaN years fall through to the oldest bucket, as in the scalar version)
+        years_ago = column('years_ago', 0).to_numpy(dtype=float)
+        recency_mult = np.select(
+            [years_ago <= 1, years_ago <= 2, years_ago <= 5],
+            [1.0, 0.9, 0.8],
+            default=0.7
+        )
+
+        return category_weight * motivation_weight * scope_mult * recency_mult
+
     @staticmethod
     def calculate_confidence_score(company_data: pd.DataFrame) -> float:
         """Calculate confidence score based on data completeness."""
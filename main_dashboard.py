@@ -11,10 +11,16 @@ from dashboard_config import (
     render_welcome_header,
     initialize_session_state
 )
-from data_utils import handle_database_loading, get_enhanced_company_suggestions
+from data_utils import handle_database_loading, get_company_suggestions_cached
 from dashboard_display import display_comprehensive_dashboard
 
 
+def _queue_selected_company():
+    """Selectbox callback: hand the pick to the next run and clear the widget"""
+    st.session_state.pending_company = st.session_state.suggestion_select
+    st.session_state.suggestion_select = None
+
+
 def enhanced_search_section():
     """Enhanced search section for the dashboard"""
 
@@ -39,44 +45,50 @@ def enhanced_search_section():
         help="Search supports exact matches, partial words, and fuzzy matching"
     )
 
-    selected_company = None
+    # A company picked on the previous run, analyzed once
+    selected_company = st.session_state.pop("pending_company", None)
 
     # Enhanced search logic
     if search_query.strip() and len(search_query.strip()) >= 2:
-        with st.spinner("🔍 Searching companies..."):
-            suggestions = get_enhanced_company_suggestions(
-                st.session_state.checker,
-                search_query,
-                max_results=15
-            )
+        # Reruns from other widgets keep the query, so reuse the last suggestions
+        query_key = (id(st.session_state.checker), search_query)
+        if st.session_state.get("_last_q") == query_key:
+            suggestions = st.session_state["_last_suggestions"]
+        else:
+            with st.spinner("🔍 Searching companies..."):
+                suggestions = get_company_suggestions_cached(
+                    st.session_state.checker,
+                    search_query,
+                    max_results=15
+                )
+            st.session_state["_last_q"] = query_key
+            st.session_state["_last_suggestions"] = suggestions
 
         if suggestions:
             st.markdown("**📋 Select from matches:**")
 
-            # Display suggestions with enhanced information
-            for i in range(0, len(suggestions), 3):
-                cols = st.columns(3)
-                for j in range(3):
-                    if i + j < len(suggestions):
-                        company_name, match_info, match_type = suggestions[i + j]
-
-                        # Color coding based on match type
-                        if match_type == "word_match":
-                            button_help = f"🎯 Word match: {match_info}"
-                        elif match_type == "fuzzy_match":
-                            button_help = f"🔍 Fuzzy match: {match_info}"
-                        else:
-                            button_help = f"🔍 Partial match: {match_info}"
-
-                        with cols[j]:
-                            if st.button(
-                                    company_name,
-                                    key=f"enhanced_suggestion_{i}_{j}",
-                                    use_container_width=True,
-                                    help=button_help
-                            ):
-                                selected_company = company_name
-                                break
+            # One selectbox instead of a button grid: a pick is a single rerun
+            labels = {}
+            for company_name, match_info, match_type in suggestions:
+                # Marker based on match type
+                if match_type == "word_match":
+                    labels[company_name] = f"{company_name}  ·  🎯 {match_info}"
+                elif match_type == "fuzzy_match":
+                    labels[company_name] = f"{company_name}  ·  🔍 {match_info}"
+                else:
+                    labels[company_name] = f"{company_name}  ·  🔍 partial: {match_info}"
+
+            st.selectbox(
+                "Select from matches",
+                list(labels),
+                index=None,
+                format_func=labels.get,
+                key="suggestion_select",
+                on_change=_queue_selected_company,
+                placeholder="Choose a company to analyze...",
+                label_visibility="collapsed",
+                help="🎯 word match · 🔍 fuzzy or partial match"
+            )
 
             # Show search tips if few results
             if len(suggestions) < 1:
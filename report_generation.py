@@ -1,8 +1,9 @@
 """
 Report generation functionality for the FET dashboard
 """
+import csv
 import io
-import pandas as pd
+import streamlit as st
 from datetime import datetime
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
@@ -12,11 +13,86 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 
 from data_utils import format_date_for_display
-
-
-
-def generate_pdf_report(result):
-    """Generate a comprehensive PDF report"""
+from risk_scoring import result_cache_key
+
+# Report styles are immutable, so build them once at import
+STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    textColor=colors.darkblue
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=12,
+    spaceBefore=20,
+    textColor=colors.darkblue
+)
+
+SUBHEADING_STYLE = ParagraphStyle(
+    'CustomSubHeading',
+    parent=STYLES['Heading3'],
+    fontSize=12,
+    spaceAfter=8,
+    spaceBefore=12,
+    textColor=colors.darkgreen
+)
+
+EXEC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+NORMAL_STYLE = STYLES['Normal']
+
+# Detail table layout: (header, candidate (column, formatter) pairs in order of preference)
+DETAIL_TABLE_COLUMNS = [
+    ('Financial Institution', [('excluded_by', None)]),
+    ('Country', [('investor_country', None)]),
+    ('ESG Category', [('sub_category', None)]),
+    ('Date', [('exclusion_date_display', None), ('exclusion_date', format_date_for_display)]),
+]
+
+
+def _table_cell(value, max_len=30):
+    """PDF table cell text: 'N/A' for missing values (v != v catches NaN/NaT), truncated to max_len"""
+    text = 'N/A' if value is None or value != value else str(value)
+    return text if len(text) <= max_len else text[:max_len - 3] + '...'
+
+
+def report_timestamp():
+    """Report generation time at minute resolution, so reruns within a minute reuse the cached PDF"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M')
+
+
+@st.cache_data(show_spinner=False, max_entries=32, hash_funcs={dict: result_cache_key})
+def generate_pdf_report(result, generated_at):
+    """Generate a comprehensive PDF report (cached per analysis result and generation time)"""
     buffer = io.BytesIO()
 
     # Create the PDF document
@@ -24,37 +100,6 @@ def generate_pdf_report(result):
                             rightMargin=72, leftMargin=72,
                             topMargin=72, bottomMargin=18)
 
-    # Get styles
-    styles = getSampleStyleSheet()
-
-    # Create custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.darkblue
-    )
-
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        spaceBefore=20,
-        textColor=colors.darkblue
-    )
-
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=12,
-        spaceAfter=8,
-        spaceBefore=12,
-        textColor=colors.darkgreen
-    )
-
     # Story elements
     story = []
 
@@ -69,11 +114,11 @@ def generate_pdf_report(result):
     business_metrics = translate_risk_to_business_language(result)
 
     # Title
-    story.append(Paragraph("🛡️ Risk Intelligence Report", title_style))
+    story.append(Paragraph("🛡️ Risk Intelligence Report", TITLE_STYLE))
     story.append(Spacer(1, 12))
 
     # Executive Summary
-    story.append(Paragraph("Executive Summary", heading_style))
+    story.append(Paragraph("Executive Summary", HEADING_STYLE))
 
     exec_summary_data = [
         ['Company Name', matched_name],
@@ -81,34 +126,26 @@ def generate_pdf_report(result):
         ['Risk Score', f"{business_metrics['enhanced_score']}/100"],
         ['Consensus', business_metrics['consensus_strength']],
         ['Total Exclusions', str(business_metrics['total_exclusions'])],
-        ['Assessment Date', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
+        ['Assessment Date', generated_at]
     ]
 
     exec_table = Table(exec_summary_data, colWidths=[2 * inch, 3 * inch])
-    exec_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    exec_table.setStyle(EXEC_TABLE_STYLE)
 
     story.append(exec_table)
     story.append(Spacer(1, 20))
 
     # Risk Assessment Details
     if business_metrics['total_exclusions'] > 0:
-        story.append(Paragraph("Risk Assessment Details", heading_style))
+        story.append(Paragraph("Risk Assessment Details", HEADING_STYLE))
 
         alert_info = get_alert_message(business_metrics['risk_level'], business_metrics, exclusion_details)
-        story.append(Paragraph(f"<b>{alert_info['title']}</b>", subheading_style))
-        story.append(Paragraph(alert_info['message'], styles['Normal']))
+        story.append(Paragraph(f"<b>{alert_info['title']}</b>", SUBHEADING_STYLE))
+        story.append(Paragraph(alert_info['message'], NORMAL_STYLE))
         story.append(Spacer(1, 12))
 
         # Score Breakdown
-        story.append(Paragraph("Score Breakdown", subheading_style))
+        story.append(Paragraph("Score Breakdown", SUBHEADING_STYLE))
         score_breakdown = business_metrics['score_breakdown']
 
         breakdown_text = f"""
@@ -119,109 +156,87 @@ def generate_pdf_report(result):
         <b>Scope (10%):</b> {score_breakdown['scope_score']:.0f}/100 - {score_breakdown['scope_desc']}
         """
 
-        story.append(Paragraph(breakdown_text, styles['Normal']))
+        story.append(Paragraph(breakdown_text, NORMAL_STYLE))
         story.append(Spacer(1, 20))
 
     # Recommendations
-    story.append(Paragraph("Operational Recommendations", heading_style))
+    story.append(Paragraph("Operational Recommendations", HEADING_STYLE))
     recommendations = result['recommendations']
     risk_level = business_metrics['risk_level']
 
     if risk_level in recommendations:
         current_recs = recommendations[risk_level]
 
-        story.append(Paragraph("Project Team Actions", subheading_style))
+        story.append(Paragraph("Project Team Actions", SUBHEADING_STYLE))
         story.append(Paragraph(current_recs.get('project_team_action', 'Standard engagement procedures apply.'),
-                               styles['Normal']))
+                               NORMAL_STYLE))
         story.append(Spacer(1, 8))
 
-        story.append(Paragraph("Compliance Requirements", subheading_style))
+        story.append(Paragraph("Compliance Requirements", SUBHEADING_STYLE))
         story.append(
-            Paragraph(current_recs.get('compliance_role', 'Standard compliance processes apply.'), styles['Normal']))
+            Paragraph(current_recs.get('compliance_role', 'Standard compliance processes apply.'), NORMAL_STYLE))
         story.append(Spacer(1, 8))
 
-        story.append(Paragraph("Contract Requirements", subheading_style))
+        story.append(Paragraph("Contract Requirements", SUBHEADING_STYLE))
         story.append(
-            Paragraph(current_recs.get('contract_scope', 'Standard contractual clauses apply.'), styles['Normal']))
+            Paragraph(current_recs.get('contract_scope', 'Standard contractual clauses apply.'), NORMAL_STYLE))
         story.append(Spacer(1, 8))
 
-        story.append(Paragraph("Monitoring Approach", subheading_style))
+        story.append(Paragraph("Monitoring Approach", SUBHEADING_STYLE))
         story.append(
-            Paragraph(current_recs.get('monitoring', 'Standard monitoring procedures apply.'), styles['Normal']))
+            Paragraph(current_recs.get('monitoring', 'Standard monitoring procedures apply.'), NORMAL_STYLE))
 
     # Exclusion Details Table (if any)
     if exclusion_details:
         story.append(PageBreak())
-        story.append(Paragraph("Detailed Exclusion Records", heading_style))
+        story.append(Paragraph("Detailed Exclusion Records", HEADING_STYLE))
 
-        # Create table data
-        df_details = pd.DataFrame(exclusion_details)
+        # Columns present in any record (what a DataFrame of the records would have)
+        present_columns = set().union(*(detail.keys() for detail in exclusion_details))
 
         # Select key columns for the PDF table
         table_columns = []
         table_headers = []
+        formatters = {}
 
-        if 'excluded_by' in df_details.columns:
-            table_columns.append('excluded_by')
-            table_headers.append('Financial Institution')
-
-        if 'investor_country' in df_details.columns:
-            table_columns.append('investor_country')
-            table_headers.append('Country')
-
-        if 'sub_category' in df_details.columns:
-            table_columns.append('sub_category')
-            table_headers.append('ESG Category')
-
-        if 'exclusion_date_display' in df_details.columns:
-            table_columns.append('exclusion_date_display')
-            table_headers.append('Date')
-        elif 'exclusion_date' in df_details.columns:
-            df_details['exclusion_date_formatted'] = df_details['exclusion_date'].apply(format_date_for_display)
-            table_columns.append('exclusion_date_formatted')
-            table_headers.append('Date')
+        for header, candidates in DETAIL_TABLE_COLUMNS:
+            for col, formatter in candidates:
+                if col in present_columns:
+                    table_columns.append(col)
+                    table_headers.append(header)
+                    if formatter is not None:
+                        formatters[col] = formatter
+                    break
 
         if table_columns:
             # Prepare table data
             table_data = [table_headers]
 
-            for _, row in df_details[table_columns].head(50).iterrows():  # Limit to 50 rows for PDF
+            for detail in exclusion_details[:50]:  # Limit to 50 rows for PDF
                 row_data = []
                 for col in table_columns:
-                    cell_value = str(row[col]) if pd.notna(row[col]) else 'N/A'
-                    # Truncate long values
-                    if len(cell_value) > 30:
-                        cell_value = cell_value[:27] + '...'
-                    row_data.append(cell_value)
+                    value = detail.get(col)
+                    if col in formatters:
+                        value = formatters[col](value)
+                    row_data.append(_table_cell(value))
                 table_data.append(row_data)
 
             # Create and style the table
             detail_table = Table(table_data, repeatRows=1)
-            detail_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
+            detail_table.setStyle(DETAIL_TABLE_STYLE)
 
             story.append(detail_table)
 
-            if len(df_details) > 50:
+            if len(exclusion_details) > 50:
                 story.append(Spacer(1, 12))
-                story.append(Paragraph(f"<i>Note: Showing first 50 of {len(df_details)} total exclusion records</i>",
-                                       styles['Normal']))
+                story.append(Paragraph(f"<i>Note: Showing first 50 of {len(exclusion_details)} total exclusion records</i>",
+                                       NORMAL_STYLE))
 
     # Footer
     story.append(Spacer(1, 30))
     story.append(Paragraph(
-        f"<i>Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} using Global Investor ESG Risk Intelligence Dashboard</i>",
-        styles['Normal']))
+        f"<i>Report generated on {generated_at} using Global Investor ESG Risk Intelligence Dashboard</i>",
+        NORMAL_STYLE))
 
     # Build PDF
     doc.build(story)
@@ -231,6 +246,16 @@ def generate_pdf_report(result):
     return buffer.getvalue()
 
 
+def exportable_result(result):
+    """Shallow copy of an analysis result without internal fields (keys starting with '_')"""
+    exported = result.copy()
+    exported['exclusion_details'] = [
+        {key: value for key, value in detail.items() if not str(key).startswith('_')}
+        for detail in result.get('exclusion_details', [])
+    ]
+    return exported
+
+
 def create_export_data(result, matched_name):
     """Create export data for CSV and JSON formats"""
     exclusion_details = result.get('exclusion_details', [])
@@ -238,7 +263,15 @@ def create_export_data(result, matched_name):
     # CSV data
     csv_data = None
     if exclusion_details:
-        export_df = pd.DataFrame(exclusion_details)
-        csv_data = export_df.to_csv(index=False)
+        # Union of keys in first-seen order; internal fields (e.g. _severity_text) are not exported
+        fieldnames = [key for key in dict.fromkeys(key for detail in exclusion_details for key in detail)
+                      if not str(key).startswith('_')]
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, restval='', extrasaction='ignore',
+                                lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(exclusion_details)
+        csv_data = buffer.getvalue()
 
     return csv_data
\ No newline at end of file
@@ -2,14 +2,54 @@
 Risk scoring and assessment logic for the FET dashboard
 CONSOLIDATED VERSION - Uses existing fet_utils functions to avoid duplication
 """
-import pandas as pd
+import re
 import numpy as np
+import streamlit as st
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 
 # Import existing foundation functions to avoid duplication
 from fet_utils import FETDataUtils
 
+# Optional single-pass keyword matcher
+try:
+    import ahocorasick
+
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Severity keyword tiers, most severe first: (terms, score, description)
+_SEVERITY_TIERS = [
+    (['forced labour', 'child labour', 'forced labor', 'child labor', 'slavery'],
+     95, "Critical Human Rights Violations"),
+    (['corruption', 'bribery', 'fraud', 'money laundering'],
+     85, "Serious Governance Issues"),
+    (['thermal coal', 'fossil expansion', 'coal mining', 'coal power'],
+     70, "Major Climate Concerns (Coal)"),
+    (['climate', 'carbon', 'emission', 'fossil', 'oil', 'gas', 'environmental'],
+     65, "Climate & Environmental Concerns"),
+    (['human rights', 'norms-based', 'norms based', 'labour rights', 'labor rights'],
+     60, "General ESG Concerns"),
+    (['controversial', 'conduct', 'business practices'],
+     55, "Business Conduct Issues"),
+]
+_COAL_TIER = 2
+
+# Terms must start at a word boundary ('oil' should not hit 'soil'); plurals still match
+if AHOCORASICK_AVAILABLE:
+    _SEVERITY_AUTOMATON = ahocorasick.Automaton()
+    for _tier, (_terms, _, _) in enumerate(_SEVERITY_TIERS):
+        for _term in _terms:
+            _SEVERITY_AUTOMATON.add_word(_term, (_tier, len(_term)))
+    _SEVERITY_AUTOMATON.make_automaton()
+
+# Fallback: one precompiled alternation per tier
+_SEVERITY_PATTERNS = [
+    re.compile(r'\b(?:' + '|'.join(map(re.escape, terms)) + ')')
+    for terms, _, _ in _SEVERITY_TIERS
+]
+
 
 def calculate_business_risk_score(result):
     """Enhanced scoring that builds on existing fet_core risk calculations to avoid duplication"""
@@ -18,22 +58,23 @@ def calculate_business_risk_score(result):
     exclusion_details = result['exclusion_details']
 
     # Handle case with no exclusions early
-    if not exclusion_details or len(exclusion_details) == 0:
+    if not exclusion_details:
         return _get_no_exclusion_score_data()
 
-    df_details = pd.DataFrame(exclusion_details)
+    # Read each input once and pass it down
     total_exclusions = len(exclusion_details)
-
-    if total_exclusions == 0:  # Double-check
-        return _get_no_exclusion_score_data()
+    investors = factors.get('unique_investors', 0)
+    countries = factors.get('unique_countries', 0)
+    recent_exclusions = factors.get('recent_exclusions', 0)
+    detail_cols = _detail_columns(exclusion_details)
 
     # Use existing consensus calculation from fet_core (already calculated in factors)
-    consensus_score = _calculate_consensus_component(factors)
+    consensus_score = _calculate_consensus_component(investors, countries)
 
     # Dashboard-specific enhancements
-    severity_score, severity_desc = _analyze_issue_severity(exclusion_details)
-    recency_score, recency_desc = _analyze_recency_patterns(exclusion_details, factors)
-    scope_score, scope_desc = _analyze_scope_impact(exclusion_details)
+    severity_score, severity_desc = _analyze_issue_severity(detail_cols)
+    recency_score, recency_desc = _analyze_recency_patterns(total_exclusions, recent_exclusions)
+    scope_score, scope_desc = _analyze_scope_impact(detail_cols)
 
     # Calculate weighted final score
     final_score = (
@@ -44,8 +85,6 @@ def calculate_business_risk_score(result):
     )
 
     # Create breakdown explanation
-    investors = factors.get('unique_investors', 0)
-    countries = factors.get('unique_countries', 0)
     breakdown = f"""
     Consensus (40%): {consensus_score['score']:.0f}/100 - {consensus_score['desc']}
     • {investors} investors, {countries} countries
@@ -68,6 +107,19 @@ def calculate_business_risk_score(result):
     }
 
 
+def _detail_columns(exclusion_details):
+    """Extract the scoring fields once: severity text per record and a sector-scope flag"""
+    return {
+        # Precomputed by analyze_company; derived here for results built elsewhere
+        'severity_text': [
+            d['_severity_text'] if '_severity_text' in d else FETDataUtils.severity_text(d)
+            for d in exclusion_details
+        ],
+        # Short-circuits on the first sector-wide exclusion
+        'sector_scope': any(d.get('scope_normalized') == 'sector' for d in exclusion_details),
+    }
+
+
 def _get_no_exclusion_score_data():
     """Return consistent no-exclusion score data"""
     return {
@@ -84,16 +136,8 @@ def _get_no_exclusion_score_data():
     }
 
 
-def _calculate_consensus_component(factors):
-    """Calculate consensus component using existing fet_core calculations"""
-    # Use existing calculations from fet_core to avoid duplication
-    investors = factors.get('unique_investors', 0)
-    countries = factors.get('unique_countries', 0)
-
-    # Use the existing consensus_adjusted_score calculation as a guide
-    # but map it to our 100-point scale for the dashboard
-    base_score = factors.get('consensus_adjusted_score', 0)
-
+def _calculate_consensus_component(investors, countries):
+    """Calculate consensus component from fet_core's investor/country counts"""
     # Map the consensus strength to our dashboard scale
     if investors >= 20 or countries >= 6:
         score = 90
@@ -118,70 +162,52 @@ def _calculate_consensus_component(factors):
     return {'score': score, 'desc': desc}
 
 
-def _analyze_issue_severity(exclusion_details):
-    """Analyze severity of issues (dashboard-specific enhancement)"""
-    if not exclusion_details:
-        return 0, "No Issues Identified"
+def _starts_word(text, start):
+    """True if text[start] begins a word (same test as a leading regex \\b)"""
+    return start == 0 or not (text[start - 1].isalnum() or text[start - 1] == '_')
 
-    df_details = pd.DataFrame(exclusion_details)
-    severity_score = 50  # Default for any exclusions
-    severity_desc = "Other Business Issues"
 
-    # Check both motivation and category columns for better detection
-    all_text_columns = []
-    if 'motivation_canonical' in df_details.columns:
-        all_text_columns.extend(df_details['motivation_canonical'].astype(str).str.lower().tolist())
-    if 'main_category' in df_details.columns:
-        all_text_columns.extend(df_details['main_category'].astype(str).str.lower().tolist())
-    if 'motivation' in df_details.columns:
-        all_text_columns.extend(df_details['motivation'].astype(str).str.lower().tolist())
+def _severity_tier(combined_text):
+    """Index of the most severe keyword tier present in the text, or None"""
+    if AHOCORASICK_AVAILABLE:
+        return min(
+            (tier for end, (tier, length) in _SEVERITY_AUTOMATON.iter(combined_text)
+             if _starts_word(combined_text, end - length + 1)),
+            default=None
+        )
+
+    for tier, pattern in enumerate(_SEVERITY_PATTERNS):
+        if pattern.search(combined_text):
+            return tier
+    return None
+
 
-    combined_text = ' '.join(all_text_columns).lower()
+def _analyze_issue_severity(detail_cols):
+    """Analyze severity of issues (dashboard-specific enhancement)"""
+    # Check both motivation and category columns for better detection
+    combined_text = ' '.join(detail_cols['severity_text'])
 
     # Issue severity assessment using existing category logic
-    if any(term in combined_text for term in
-           ['forced labour', 'child labour', 'forced labor', 'child labor', 'slavery']):
-        severity_score = 95
-        severity_desc = "Critical Human Rights Violations"
-    elif any(term in combined_text for term in ['corruption', 'bribery', 'fraud', 'money laundering']):
-        severity_score = 85
-        severity_desc = "Serious Governance Issues"
-    elif any(term in combined_text for term in ['thermal coal', 'fossil expansion', 'coal mining', 'coal power']):
-        # Check scope using existing scope_normalized field
-        if 'scope_normalized' in df_details.columns and (df_details['scope_normalized'] == 'sector').any():
-            severity_score = 80
-            severity_desc = "Major Climate Concerns (Sector-Wide Coal)"
-        else:
-            severity_score = 70
-            severity_desc = "Major Climate Concerns (Coal)"
-    elif any(term in combined_text for term in
-             ['climate', 'carbon', 'emission', 'fossil', 'oil', 'gas', 'environmental']):
-        severity_score = 65
-        severity_desc = "Climate & Environmental Concerns"
-    elif any(term in combined_text for term in
-             ['human rights', 'norms-based', 'norms based', 'labour rights', 'labor rights']):
-        severity_score = 60
-        severity_desc = "General ESG Concerns"
-    elif any(term in combined_text for term in ['controversial', 'conduct', 'business practices']):
-        severity_score = 55
-        severity_desc = "Business Conduct Issues"
+    tier = _severity_tier(combined_text)
+    if tier is None:
+        return 50, "Other Business Issues"  # Default for any exclusions
+
+    _, severity_score, severity_desc = _SEVERITY_TIERS[tier]
+
+    # Coal: check scope using existing scope_normalized field
+    if tier == _COAL_TIER and detail_cols['sector_scope']:
+        severity_score = 80
+        severity_desc = "Major Climate Concerns (Sector-Wide Coal)"
 
     return severity_score, severity_desc
 
 
-def _analyze_recency_patterns(exclusion_details, factors):
+def _analyze_recency_patterns(total_exclusions, recent_exclusions):
     """Analyze recency patterns (dashboard-specific enhancement)"""
-    if not exclusion_details:
+    if not total_exclusions:
         return 0, "No Recent Activity"
 
-    total_exclusions = len(exclusion_details)
-    recent_exclusions = factors.get('recent_exclusions', 0)
-
-    # Safe division to avoid division by zero
-    if total_exclusions > 0:
-        recency_ratio = recent_exclusions / total_exclusions
-    else:
-        recency_ratio = 0
+    recency_ratio = recent_exclusions / total_exclusions
 
     if recency_ratio >= 0.8:
         return 100, "Very Recent Activity"
@@ -195,21 +221,11 @@ def _analyze_recency_patterns(exclusion_details, factors):
         return 20, "Historical Issues Only"
 
 
-def _analyze_scope_impact(exclusion_details):
+def _analyze_scope_impact(detail_cols):
     """Analyze scope impact (using existing scope_normalized field)"""
-    if not exclusion_details:
-        return 0, "No Exclusions"
-
-    df_details = pd.DataFrame(exclusion_details)
-    scope_score = 70  # Default company-level
-    scope_desc = "Company-Level"
-
-    if 'scope_normalized' in df_details.columns:
-        if (df_details['scope_normalized'] == 'sector').any():
-            scope_score = 100
-            scope_desc = "Sector-Wide Impact"
-
-    return scope_score, scope_desc
+    if detail_cols['sector_scope']:
+        return 100, "Sector-Wide Impact"
+    return 70, "Company-Level"  # Default company-level
 
 
 def determine_risk_level_and_explanation(score_data, factors):
@@ -235,6 +251,17 @@ def determine_risk_level_and_explanation(score_data, factors):
     return level, explanation, color_class
 
 
+def result_cache_key(result):
+    """Cheap identity for an analysis result, used instead of hashing the whole dict"""
+    factors = result.get('risk_assessment', {}).get('factors', {})
+    return (
+        result.get('query', {}).get('company_name'),
+        len(result.get('exclusion_details') or []),
+        factors.get('consensus_adjusted_score'),
+    )
+
+
+@st.cache_data(show_spinner=False, ttl=24 * 60 * 60, hash_funcs={dict: result_cache_key})
 def translate_risk_to_business_language(result):
     """Translate risk to business language using consolidated scoring"""
     factors = result['risk_assessment']['factors']
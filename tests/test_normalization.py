@@ -0,0 +1,81 @@
+"""
+Company-name normalization must reproduce the original per-suffix loop exactly
+"""
+import re
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from fet_utils import FETDataUtils
+from wb_sanctions import WorldBankSanctionsHandler
+
+APP_DIR = Path(__file__).resolve().parent.parent
+FET_FILE = APP_DIR / "2024-095 FET - 2024 standardized dataset 241210.xlsx"
+WB_FILE = APP_DIR / "Sanctioned individuals and firms.xlsx"
+
+
+def reference_normalize(name) -> str:
+    """The original normalize_company_name, kept verbatim as the reference"""
+    if pd.isna(name):
+        return ""
+
+    name = str(name).strip().lower()
+
+    legal_suffixes = [
+        'inc', 'incorporated', 'corp', 'corporation', 'ltd', 'limited',
+        'llc', 'plc', 'sa', 'ag', 'gmbh', 'bv', 'nv', 'spa', 'srl',
+        'co', 'company', 'group', 'holding', 'holdings', 'international',
+        'global', 'worldwide', 'enterprises', 'solutions'
+    ]
+
+    for suffix in legal_suffixes:
+        pattern = rf'\b{re.escape(suffix)}\.?\s*$'
+        name = re.sub(pattern, '', name)
+
+    name = re.sub(r'[^\w\s&-]', ' ', name)
+    name = re.sub(r'\s+', ' ', name)
+
+    return name.strip()
+
+
+class NormalizeCompanyNameTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        if not FET_FILE.exists() or not WB_FILE.exists():
+            raise unittest.SkipTest("bundled workbooks not available")
+        fet = pd.read_excel(FET_FILE, engine='openpyxl', usecols=[FETDataUtils.COLUMNS['company_group']])
+        cls.fet_names = fet[FETDataUtils.COLUMNS['company_group']].drop_duplicates().tolist()
+        cls.wb_names = WorldBankSanctionsHandler._read_firm_names(WB_FILE)
+
+    def assert_matches_reference(self, names):
+        diffs = [(name, reference_normalize(name), FETDataUtils.normalize_company_name(name))
+                 for name in names
+                 if FETDataUtils.normalize_company_name(name) != reference_normalize(name)]
+        self.assertEqual(diffs, [])
+
+    def test_stacked_suffixes(self):
+        self.assert_matches_reference([
+            "Anhui Province Energy Group Co Ltd", "Seven Group Holdings", "TCC Group Holdings",
+            "TCC International Holdings", "X Ltd Co", "Acme Inc.", "Foo Co., Ltd.", "Zinc", None, ""
+        ])
+        self.assertEqual(FETDataUtils.normalize_company_name("Anhui Province Energy Group Co Ltd"),
+                         "anhui province energy")
+        self.assertEqual(FETDataUtils.normalize_company_name("Seven Group Holdings"), "seven group")
+
+    def test_fet_workbook_names(self):
+        self.assert_matches_reference(self.fet_names)
+
+    def test_wb_workbook_names(self):
+        self.assert_matches_reference(self.wb_names)
+
+    def test_series_matches_scalar(self):
+        for names in (self.fet_names, self.wb_names, [None, "", "  Foo Co., Ltd. ", 12345, "Zinc"]):
+            series = pd.Series(names, dtype=object)
+            expected = [FETDataUtils.normalize_company_name(name) for name in names]
+            self.assertEqual(FETDataUtils.normalize_company_name_series(series).tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Severity keyword scanning: the regex fallback and the optional Aho-Corasick path must agree
+"""
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import risk_scoring
+from fet_utils import FETDataUtils
+
+APP_DIR = Path(__file__).resolve().parent.parent
+FET_FILE = APP_DIR / "2024-095 FET - 2024 standardized dataset 241210.xlsx"
+
+SAMPLE_TEXTS = [
+    "", "soil contamination", "oil sands", "turmoil in the boardroom", "oils and gases",
+    "coal mining expansion", "thermal coal", "coal", "forced labour in supply chain",
+    "norms-based exclusion", "human rights; corruption", "controversial weapons",
+    "business practices", "misconduct", "emissions", "carbon-intensive", "_oil",
+]
+
+
+def fallback_tier(text):
+    """_severity_tier with the Aho-Corasick automaton switched off"""
+    with mock.patch.object(risk_scoring, 'AHOCORASICK_AVAILABLE', False):
+        return risk_scoring._severity_tier(text)
+
+
+class SeverityTierTest(unittest.TestCase):
+
+    def test_fallback_tiers(self):
+        expected = {
+            "soil contamination": None, "turmoil in the boardroom": None, "oil sands": 3,
+            "oils and gases": 3, "coal mining expansion": 2, "coal": None,
+            "forced labour in supply chain": 0, "human rights; corruption": 1,
+            "misconduct": None, "business practices": 5, "_oil": None,
+        }
+        for text, tier in expected.items():
+            self.assertEqual(fallback_tier(text), tier, text)
+
+    @unittest.skipUnless(risk_scoring.AHOCORASICK_AVAILABLE, "pyahocorasick not installed")
+    def test_automaton_matches_fallback(self):
+        texts = list(SAMPLE_TEXTS)
+        if FET_FILE.exists():
+            columns = [FETDataUtils.COLUMNS['motivation'], FETDataUtils.COLUMNS['main_category']]
+            fet = pd.read_excel(FET_FILE, engine='openpyxl', usecols=columns).drop_duplicates()
+            texts += [
+                FETDataUtils.severity_text({'main_category': category, 'motivation': motivation})
+                for motivation, category in fet[columns].astype(object).where(fet[columns].notna(), None)
+                .itertuples(index=False)
+            ]
+
+        diffs = [(text, risk_scoring._severity_tier(text), fallback_tier(text)) for text in texts
+                 if risk_scoring._severity_tier(text) != fallback_tier(text)]
+        self.assertEqual(diffs, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+World Bank sanctions matching must score exactly as the original fuzzywuzzy scorers did
+"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from wb_sanctions import WorldBankSanctionsHandler, _SanctionsSnapshot
+
+APP_DIR = Path(__file__).resolve().parent.parent
+WB_FILE = APP_DIR / "Sanctioned individuals and firms.xlsx"
+
+# (s1, s2, partial_ratio, token_sort_ratio) as returned by fuzzywuzzy 0.18 with python-Levenshtein
+FUZZYWUZZY_SCORES = [
+    ('ebay', 'bayon water pump co., ltd.', 75, 22),
+    ('bae systems', 'groupe systèmes', 73, 64),
+    ('ibm', 'gap international', 33, 10),
+    ('adani group', 'seydou idani', 38, 61),
+    ('samsung', 'mrs. shamsunnahar', 71, 52),
+    ('china railway', 'china railway construction', 100, 67),
+    ('abcd', 'xxxbcdeeee', 75, 43),
+    ('', '', 100, 100),
+]
+
+
+class ScorerTest(unittest.TestCase):
+
+    def test_scores_match_fuzzywuzzy(self):
+        for s1, s2, partial, token_sort in FUZZYWUZZY_SCORES:
+            self.assertEqual(_SanctionsSnapshot._partial_score(s1, s2), partial, (s1, s2))
+            sorted1, sorted2 = _SanctionsSnapshot._sort_tokens(s1), _SanctionsSnapshot._sort_tokens(s2)
+            self.assertEqual(_SanctionsSnapshot._token_sort_score(sorted1, sorted2), token_sort, (s1, s2))
+
+
+class CheckWbSanctionsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        if not WB_FILE.exists():
+            raise unittest.SkipTest("bundled WB workbook not available")
+        cls.app_dir = Path(tempfile.mkdtemp())
+        shutil.copy(WB_FILE, cls.app_dir)
+        cls.handler = WorldBankSanctionsHandler(cls.app_dir)
+        cls.handler.load_wb_sanctions()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.app_dir, ignore_errors=True)
+
+    def test_no_spurious_matches_on_short_names(self):
+        for company in ['eBay', 'BAE Systems', 'IBM', 'Adani Group', 'Samsung']:
+            self.assertFalse(self.handler.check_wb_sanctions(company)['found'], company)
+
+    def test_listed_firm_matches_exactly(self):
+        firm = self.handler.sanctions_list[0]
+        result = self.handler.check_wb_sanctions(firm)
+        self.assertTrue(result['found'])
+        self.assertEqual(result['confidence'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,112 +3,330 @@ World Bank Sanctions Database Handler
 """
 import pandas as pd
 import numpy as np
-import pickle
+import pyarrow as pa
+import pyarrow.feather as feather
+import heapq
+import io
 import streamlit as st
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional, Set
-from fuzzywuzzy import fuzz
+from openpyxl import load_workbook
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Indel, Levenshtein
 import re
 import logging
+from collections import Counter
+from functools import lru_cache
+import threading
 
 from fet_utils import FETDataUtils
 
 logger = logging.getLogger(__name__)
 
+# Character-count histograms fold code points into this many buckets (merging buckets
+# only loosens the shared-character bound, so the partial_ratio pre-filter stays exact)
+_CHAR_BUCKETS = 64
+
+# Export metadata and the header row in the first column of the WB workbook
+_META_RE = re.compile(r'Downloaded|Firm Name')
+
+# fuzzywuzzy's full_process(force_ascii=True), which the match thresholds were tuned against:
+# drop code points 128-255, turn every non-word character into a space, lowercase, trim
+_LATIN1_CHARS = {code_point: None for code_point in range(128, 256)}
+_PROCESS_NONWORD = re.compile(r'(?ui)\W')
+
+
+class _SanctionsSnapshot:
+    """One loaded firm list and every lookup derived from it, built once and never mutated.
+
+    The handler swaps whole snapshots, so a lookup always sees one consistent generation.
+    """
+
+    def __init__(self, firms: List[str] = (), firm_keys: List[str] = ()):
+        self.sanctions_list = list(firms)
+        self.firm_keys = list(firm_keys)  # normalized key per firm, '' when it normalizes away
+        # Later firms win on duplicate keys
+        self.normalized_sanctions = {key: firm for key, firm in zip(self.firm_keys, self.sanctions_list) if key}
+
+        # Fuzzy-match choices derived from the lookups above
+        self.lower_sanctions = [name.lower() for name in self.sanctions_list]
+
+        # Integer-encoded word index: sorted vocabulary plus CSR postings of entity ids
+        word_index: Dict[str, List[int]] = {}
+        for entity_id, name in enumerate(self.lower_sanctions):
+            for word in set(name.split()):
+                word_index.setdefault(word, []).append(entity_id)
+
+        words = sorted(word_index)
+        self.vocab = np.array(words, dtype=str)
+        self.vocab_ids = {word: word_id for word_id, word in enumerate(words)}
+        self.posting_ptr = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum([len(word_index[word]) for word in words], out=self.posting_ptr[1:])
+        self.posting_ids = np.fromiter(
+            (entity_id for word in words for entity_id in word_index[word]),
+            dtype=np.int32, count=int(self.posting_ptr[-1])
+        )
+
+        self.normalized_names = list(self.normalized_sanctions)
+        self.normalized_originals = list(self.normalized_sanctions.values())
+
+        # token_sort_ratio is ratio over processed, token-sorted strings: do the choice side once
+        self.sorted_sanctions = [self._sort_tokens(name) for name in self.lower_sanctions]
+        self.sorted_normalized_names = [self._sort_tokens(name) for name in self.normalized_names]
+
+        # Per-choice character histograms and lengths for the partial_ratio pre-filter
+        self.char_counts, self.lengths = self._char_stats(self.lower_sanctions)
+        self.normalized_char_counts, self.normalized_lengths = self._char_stats(self.normalized_names)
+
+        # Results per (normalized query, lowercased query, threshold); dropped with the snapshot
+        self.find_match_cached = lru_cache(maxsize=10_000)(self.find_match)
+
+    @staticmethod
+    def _char_histogram(text: str) -> np.ndarray:
+        """Bucketed character counts of text"""
+        code_points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        return np.bincount(code_points % _CHAR_BUCKETS, minlength=_CHAR_BUCKETS)
+
+    @classmethod
+    def _char_stats(cls, names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Character histogram matrix and length vector for a list of choices"""
+        counts = np.zeros((len(names), _CHAR_BUCKETS), dtype=np.int32)
+        for row, name in enumerate(names):
+            counts[row] = cls._char_histogram(name)
+        return counts, np.array([len(name) for name in names], dtype=np.int32)
+
+    @classmethod
+    def _partial_ratio_candidates(cls, query: str, char_counts: np.ndarray, lengths: np.ndarray,
+                                  cutoff: float) -> np.ndarray:
+        """Indices of choices whose partial_ratio against query can still reach cutoff.
+
+        Scoring t (as a fraction) needs an alignment of the shorter string with an LCS of at
+        least t/(2-t) of its length, and no LCS exceeds the characters both strings share.
+        """
+        t = cutoff / 100
+        shared = np.minimum(char_counts, cls._char_histogram(query)).sum(axis=1)
+        return np.flatnonzero(shared * (2 - t) >= t * np.minimum(lengths, len(query)))
+
+    @staticmethod
+    def _sort_tokens(text: str) -> str:
+        """Preprocess text and sort its tokens, as fuzzywuzzy's token_sort_ratio does internally"""
+        processed = _PROCESS_NONWORD.sub(' ', text.translate(_LATIN1_CHARS)).lower().strip()
+        return ' '.join(sorted(processed.split()))
+
+    @staticmethod
+    def _token_sort_score(sorted_query: str, sorted_choice: str) -> int:
+        """fuzzywuzzy token_sort_ratio on pre-sorted strings (rounded half to even, as it did)"""
+        return round(100 * Indel.normalized_similarity(sorted_query, sorted_choice))
+
+    @staticmethod
+    def _partial_score(s1: str, s2: str) -> int:
+        """fuzzywuzzy partial_ratio: best ratio over windows aligned with the matching blocks.
+
+        Only windows anchored at a matching block are tried, so this is never above RapidFuzz's
+        partial_ratio (which searches every alignment); short names often score much lower.
+        """
+        if s1 == s2:
+            return 100
+        if not s1 or not s2:
+            return 0
+
+        shorter, longer = (s1, s2) if len(s1) <= len(s2) else (s2, s1)
+        best = 0.0
+        for block in Levenshtein.opcodes(shorter, longer).as_matching_blocks():
+            long_start = max(block.b - block.a, 0)
+            similarity = Indel.normalized_similarity(shorter, longer[long_start:long_start + len(shorter)])
+            if similarity > .995:
+                return 100
+            best = max(best, similarity)
+        return round(100 * best)
+
+    def find_match(self, normalized_query: str, query_lower: str,
+                   fuzzy_threshold: int) -> Optional[Tuple[str, str, int]]:
+        """(matched_name, match_type, confidence) for a query, or None when nothing matches"""
+        # 1. Exact normalized match
+        if normalized_query in self.normalized_sanctions:
+            return self.normalized_sanctions[normalized_query], 'exact', 100
+
+        # 2. Fuzzy matching (original names first, then normalized names).
+        # Deliberately max(token_sort, partial) rather than a single WRatio pass: WRatio's
+        # token-set component lets a shared leading word ("MR.", "SHANGHAI") clear the threshold
+        # against unrelated entities, which is the wrong trade for sanctions screening
+        best_match = None
+        best_score = 0
+
+        searches = [
+            (query_lower, self.lower_sanctions, self.sorted_sanctions,
+             self.char_counts, self.lengths, self.sanctions_list),
+            (normalized_query, self.normalized_names, self.sorted_normalized_names,
+             self.normalized_char_counts, self.normalized_lengths, self.normalized_originals),
+        ]
+        for query, choices, sorted_choices, char_counts, lengths, originals in searches:
+            if not choices:
+                continue
+
+            # RapidFuzz narrows each row to candidates, which are then rescored exactly as
+            # fuzzywuzzy did: its ratio is the same Indel similarity, and its partial_ratio only
+            # tries some of the alignments RapidFuzz's optimal partial_ratio searches, so the
+            # RapidFuzz scores bound the old ones from above. The cutoff leaves room for rounding
+            cutoff = max(fuzzy_threshold - 1, 0)
+            sorted_query = self._sort_tokens(query)
+            scores = np.zeros(len(choices), dtype=np.int32)
+
+            # workers=-1 spreads each row over all cores in RapidFuzz's C++ thread pool (GIL released)
+            token_sort_scores = process.cdist([sorted_query], sorted_choices, scorer=fuzz.ratio,
+                                              score_cutoff=cutoff, workers=-1)[0]
+            for i in np.flatnonzero(token_sort_scores):
+                scores[i] = self._token_sort_score(sorted_query, sorted_choices[i])
+
+            # token ratio already skips out-of-reach lengths internally; partial_ratio has no length
+            # bound, so pre-filter it on shared characters and only score the survivors
+            in_reach = self._partial_ratio_candidates(query, char_counts, lengths, cutoff)
+            if in_reach.size:
+                partial_scores = process.cdist(
+                    [query], [choices[i] for i in in_reach],
+                    scorer=fuzz.partial_ratio, score_cutoff=cutoff, workers=-1
+                )[0]
+                for i in in_reach[np.flatnonzero(partial_scores)]:
+                    scores[i] = max(scores[i], self._partial_score(query, choices[i]))
+
+            # argmax returns the first best, matching the earlier in-order scan
+            best_index = int(scores.argmax())
+            score = int(scores[best_index])
+            if score > best_score and score >= fuzzy_threshold:
+                best_match = originals[best_index]
+                best_score = score
+
+        if best_match:
+            return best_match, 'fuzzy', best_score
+        return None
+
 
 class WorldBankSanctionsHandler:
     """Handler for World Bank sanctions database"""
 
-    def __init__(self, app_dir: Path):
+    def __init__(self, app_dir: Path, warm_from_cache: bool = True):
         self.app_dir = app_dir
-        self.sanctions_list = []
-        self.normalized_sanctions = {}
+        # Readers take this reference once per call; reloads build a new snapshot and swap it in
+        self._snapshot = _SanctionsSnapshot()
+        self._swap_lock = threading.Lock()
         self.cache_dir = app_dir / "cache"
         self.cache_dir.mkdir(exist_ok=True)
 
         # Cache file for WB sanctions
-        self.wb_cache_file = self.cache_dir / "wb_sanctions_v1.pkl"
+        self.wb_cache_file = self.cache_dir / "wb_sanctions_v6.arrow"
+
+        # Read the cache in the background so the first lookup doesn't pay for it;
+        # loads and lookups wait on this event before touching the data. Handlers for uploaded
+        # lists skip it: the cache holds the default workbook
+        self._cache_warmed = threading.Event()
+        if warm_from_cache:
+            threading.Thread(target=self._warm_from_cache, name="wb-sanctions-warmup", daemon=True).start()
+        else:
+            self._cache_warmed.set()
+
+    @property
+    def sanctions_list(self) -> List[str]:
+        return self._snapshot.sanctions_list
+
+    @property
+    def normalized_sanctions(self) -> Dict[str, str]:
+        return self._snapshot.normalized_sanctions
+
+    def _warm_from_cache(self):
+        """Background warm-up: populate the lookups from the cache file if there is one"""
+        try:
+            self._load_from_cache()
+        finally:
+            self._cache_warmed.set()
 
     def load_wb_sanctions(self, file_data: bytes = None) -> bool:
         """Load World Bank sanctions database"""
 
-        # Try to load from cache first
-        if self._load_from_cache():
+        # Try the cache first (the warm-up may already have loaded it); it mirrors the default
+        # workbook, so uploaded data is never read from or written to it
+        self._cache_warmed.wait()
+        if file_data is None and (self._snapshot.sanctions_list or self._load_from_cache()):
             return True
 
         try:
             # Load the Excel file
             if file_data:
-                df = pd.read_excel(file_data, engine='openpyxl')
+                firms = self._read_firm_names(io.BytesIO(file_data))
             else:
                 # Try default location
                 wb_file = self.app_dir / "Sanctioned individuals and firms.xlsx"
                 if wb_file.exists():
-                    df = pd.read_excel(wb_file, engine='openpyxl')
+                    firms = self._read_firm_names(wb_file)
                 else:
                     st.warning("📂 World Bank sanctions file not found")
                     return False
 
-            # Extract firm names (skip metadata rows)
-            firms = []
-            for _, row in df.iterrows():
-                if pd.notna(row.iloc[0]):
-                    firm_name = str(row.iloc[0]).strip()
-                    # Skip metadata and header rows
-                    if (len(firm_name) > 3 and
-                            'Downloaded' not in firm_name and
-                            'Firm Name' not in firm_name and
-                            firm_name != ''):
-                        firms.append(firm_name)
-
-            self.sanctions_list = firms
-
-            # Create normalized lookup
-            self.normalized_sanctions = {}
-            for firm in firms:
-                normalized = FETDataUtils.normalize_company_name(firm)
-                if normalized:
-                    self.normalized_sanctions[normalized] = firm
+            snapshot = self._set_firms(
+                firms, FETDataUtils.normalize_company_name_series(pd.Series(firms, dtype=object)).tolist()
+            )
 
             # Save to cache
-            self._save_to_cache()
+            if file_data is None:
+                self._save_to_cache(snapshot)
 
-            st.success(f"✅ Loaded {len(self.sanctions_list)} World Bank sanctioned entities")
+            st.success(f"✅ Loaded {len(snapshot.sanctions_list)} World Bank sanctioned entities")
             return True
 
         except Exception as e:
             st.error(f"❌ Failed to load World Bank sanctions: {e}")
             return False
 
+    @staticmethod
+    def _read_firm_names(source) -> List[str]:
+        """Stream firm names from the first column of the first sheet (skip metadata and header rows)"""
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            firms = []
+            for (value,) in workbook.worksheets[0].iter_rows(min_col=1, max_col=1, values_only=True):
+                if value is None:
+                    continue
+                firm_name = str(value).strip()
+                if len(firm_name) > 3 and _META_RE.search(firm_name) is None:
+                    firms.append(firm_name)
+            return firms
+        finally:
+            workbook.close()
+
     def _load_from_cache(self) -> bool:
         """Load from cache if available"""
         try:
             if self.wb_cache_file.exists():
-                with open(self.wb_cache_file, 'rb') as f:
-                    cache_data = pickle.load(f)
+                # Uncompressed Arrow IPC: memory-mapped, the string columns are read without decoding
+                table = feather.read_table(self.wb_cache_file, memory_map=True)
+                snapshot = self._set_firms(table.column('firm').to_pylist(), table.column('normalized').to_pylist())
 
-                self.sanctions_list = cache_data['sanctions_list']
-                self.normalized_sanctions = cache_data['normalized_sanctions']
-
-                logger.info(f"✅ Loaded {len(self.sanctions_list)} WB sanctions from cache")
+                logger.info(f"✅ Loaded {len(snapshot.sanctions_list)} WB sanctions from cache")
                 return True
         except Exception as e:
             logger.warning(f"Failed to load WB cache: {e}")
 
         return False
 
-    def _save_to_cache(self):
+    def _set_firms(self, firms: List[str], firm_keys: List[str]) -> _SanctionsSnapshot:
+        """Build the lookups for a firm list off to the side, then publish them in one swap"""
+        snapshot = _SanctionsSnapshot(firms, firm_keys)
+        with self._swap_lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def _save_to_cache(self, snapshot: _SanctionsSnapshot):
         """Save to cache"""
         try:
-            cache_data = {
-                'sanctions_list': self.sanctions_list,
-                'normalized_sanctions': self.normalized_sanctions,
-                'created_at': datetime.now().timestamp()
-            }
+            # Two aligned string columns; everything else is rebuilt from them on load
+            table = pa.table({'firm': snapshot.sanctions_list, 'normalized': snapshot.firm_keys},
+                             metadata={'created_at': str(int(datetime.now().timestamp()))})
+            feather.write_feather(table, self.wb_cache_file, compression='uncompressed')
 
-            with open(self.wb_cache_file, 'wb') as f:
-                pickle.dump(cache_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Caches from earlier versions hold keys this version no longer produces
+            for old_file in self.cache_dir.glob("wb_sanctions_v*.arrow"):
+                if old_file != self.wb_cache_file:
+                    old_file.unlink(missing_ok=True)
 
             logger.info("💾 World Bank sanctions cached successfully")
         except Exception as e:
@@ -116,8 +334,16 @@ class WorldBankSanctionsHandler:
 
     def check_wb_sanctions(self, company_name: str, fuzzy_threshold: int = 85) -> Dict:
         """Check if company is in World Bank sanctions list"""
+        self._cache_warmed.wait()
+        snapshot = self._snapshot
 
-        if not self.sanctions_list:
+        match = None
+        if snapshot.sanctions_list:
+            # The normalized and lowercased forms of the query key the result cache
+            match = snapshot.find_match_cached(FETDataUtils.normalize_company_name(company_name),
+                                               company_name.lower(), fuzzy_threshold)
+
+        if match is None:
             return {
                 'found': False,
                 'matched_name': None,
@@ -126,122 +352,74 @@ class WorldBankSanctionsHandler:
                 'details': []
             }
 
-        # Normalize the query
-        normalized_query = FETDataUtils.normalize_company_name(company_name)
-
-        # 1. Exact normalized match
-        if normalized_query in self.normalized_sanctions:
-            original_name = self.normalized_sanctions[normalized_query]
-            return {
-                'found': True,
-                'matched_name': original_name,
-                'match_type': 'exact',
-                'confidence': 100,
-                'details': [{
-                    'sanctioned_entity': original_name,
-                    'source': 'World Bank',
-                    'sanction_type': 'World Bank Debarment',
-                    'match_confidence': 100
-                }]
-            }
-
-        # 2. Fuzzy matching
-        best_match = None
-        best_score = 0
-
-        # Try fuzzy matching against original names
-        for original_name in self.sanctions_list:
-            # Compare with original name
-            score1 = fuzz.token_sort_ratio(company_name.lower(), original_name.lower())
-            score2 = fuzz.partial_ratio(company_name.lower(), original_name.lower())
-            score = max(score1, score2)
-
-            if score > best_score and score >= fuzzy_threshold:
-                best_match = original_name
-                best_score = score
-
-        # Also try against normalized names
-        for normalized_name, original_name in self.normalized_sanctions.items():
-            score1 = fuzz.token_sort_ratio(normalized_query, normalized_name)
-            score2 = fuzz.partial_ratio(normalized_query, normalized_name)
-            score = max(score1, score2)
-
-            if score > best_score and score >= fuzzy_threshold:
-                best_match = original_name
-                best_score = score
-
-        if best_match:
-            return {
-                'found': True,
-                'matched_name': best_match,
-                'match_type': 'fuzzy',
-                'confidence': best_score,
-                'details': [{
-                    'sanctioned_entity': best_match,
-                    'source': 'World Bank',
-                    'sanction_type': 'World Bank Debarment',
-                    'match_confidence': best_score
-                }]
-            }
-
+        matched_name, match_type, confidence = match
         return {
-            'found': False,
-            'matched_name': None,
-            'match_type': None,
-            'confidence': 0,
-            'details': []
+            'found': True,
+            'matched_name': matched_name,
+            'match_type': match_type,
+            'confidence': confidence,
+            'details': [{
+                'sanctioned_entity': matched_name,
+                'source': 'World Bank',
+                'sanction_type': 'World Bank Debarment',
+                'match_confidence': confidence
+            }]
         }
 
     def search_similar_wb_sanctions(self, search_term: str, limit: int = 10) -> List[str]:
         """Search for similar sanctioned entities"""
-        if not self.sanctions_list:
+        self._cache_warmed.wait()
+        snapshot = self._snapshot
+        if not snapshot.sanctions_list:
             return []
 
-        search_words = [word.strip().lower() for word in search_term.split() if word.strip()]
+        # split() drops empty tokens and surrounding whitespace, so lowercase the term once
+        search_words = search_term.lower().split()
         if not search_words:
             return []
 
-        matches = []
-
-        for entity in self.sanctions_list:
-            entity_lower = entity.lower()
-            entity_words = entity_lower.split()
-
-            # Count word matches
-            word_match_count = 0
-            for search_word in search_words:
-                if any(search_word == entity_word for entity_word in entity_words):
-                    word_match_count += 1
-
-            # Count partial matches
-            partial_match_count = 0
-            for search_word in search_words:
-                if any(search_word in entity_word for entity_word in entity_words):
-                    partial_match_count += 1
-
-            if word_match_count > 0:
-                score = word_match_count * 100 + partial_match_count * 10
-                matches.append((entity, score, f"word matches: {word_match_count}"))
-            elif partial_match_count > 0:
-                score = partial_match_count * 10
-                matches.append((entity, score, f"partial matches: {partial_match_count}"))
-
-        # Sort by score
-        matches.sort(key=lambda x: x[1], reverse=True)
+        # Per-entity counts of search words found as a whole word / inside some word,
+        # accumulated over the integer-encoded index instead of comparing strings per entity
+        word_counts = np.zeros(len(snapshot.sanctions_list), dtype=np.int32)
+        partial_counts = np.zeros(len(snapshot.sanctions_list), dtype=np.int32)
+        # Each distinct search word is looked up once; repeats count once per occurrence, as before
+        for search_word, occurrences in Counter(search_words).items():
+            word_ids = np.flatnonzero(np.char.find(snapshot.vocab, search_word) >= 0)
+            if word_ids.size:
+                entity_ids = np.concatenate(
+                    [snapshot.posting_ids[snapshot.posting_ptr[i]:snapshot.posting_ptr[i + 1]] for i in word_ids]
+                )
+                partial_counts[np.unique(entity_ids)] += occurrences
+
+            word_id = snapshot.vocab_ids.get(search_word)
+            if word_id is not None:
+                word_counts[snapshot.posting_ids[snapshot.posting_ptr[word_id]:snapshot.posting_ptr[word_id + 1]]] += occurrences
+
+        # Every whole-word hit is also a partial hit, so the candidates are the partial hits
+        candidates = np.flatnonzero(partial_counts)
+        scores = np.where(word_counts > 0, word_counts * 100 + partial_counts * 10, partial_counts * 10)
+
+        # Keep the best `limit` by score (ties stay in entity order, as with a stable sort)
+        top_ids = heapq.nlargest(limit, candidates.tolist(), key=scores.__getitem__)
 
         # Format results
         formatted_results = []
-        for entity, score, match_type in matches[:limit]:
-            formatted_results.append(f"{entity} ({match_type})")
+        for entity_id in top_ids:
+            if word_counts[entity_id] > 0:
+                match_type = f"word matches: {word_counts[entity_id]}"
+            else:
+                match_type = f"partial matches: {partial_counts[entity_id]}"
+            formatted_results.append(f"{snapshot.sanctions_list[entity_id]} ({match_type})")
 
         return formatted_results
 
     def get_stats(self) -> Dict:
         """Get statistics about the WB sanctions database"""
+        snapshot = self._snapshot
         return {
-            'total_entities': len(self.sanctions_list),
+            'total_entities': len(snapshot.sanctions_list),
             'cache_exists': self.wb_cache_file.exists(),
-            'normalized_count': len(self.normalized_sanctions)
+            'normalized_count': len(snapshot.normalized_sanctions)
         }
 
     def clear_cache(self):
@@ -251,4 +429,12 @@ class WorldBankSanctionsHandler:
                 self.wb_cache_file.unlink()
             logger.info("🗑️ World Bank sanctions cache cleared")
         except Exception as e:
-            logger.warning(f"Failed to clear WB cache: {e}")
\ No newline at end of file
+            logger.warning(f"Failed to clear WB cache: {e}")
+
+@st.cache_resource(show_spinner=False)
+def get_wb_handler(app_dir: Path) -> WorldBankSanctionsHandler:
+    """One default-dataset sanctions handler per app directory, shared by every checker and session.
+
+    Never load uploaded data into it; uploads get their own handler (FETCoreEngine.use_wb_upload).
+    """
+    return WorldBankSanctionsHandler(app_dir)